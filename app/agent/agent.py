@@ -11,21 +11,22 @@ OPENAI_API_KEY is set or the API call fails.
 from __future__ import annotations
 
 import logging
+import threading
 import time
-from dataclasses import asdict, dataclass
-from typing import Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Iterator, Optional
 
 from app.agent.intent import Intent
-from app.agent.llm_intent import smart_classify
-from app.agent.tools import dispatch
+from app.agent.tools import chitchat_stream, dispatch
 from app.agent.formatter import format_response
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentResponse:
-    """Value object returned by ``ask()``."""
+    """Immutable value object returned by ``ask()``."""
     intent: str
     branch: Optional[str]
     answer: str                # human-readable Markdown
@@ -35,21 +36,98 @@ class AgentResponse:
     confidence: float = 0.0
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        # Not dataclasses.asdict(): that deep-copies the whole raw_data payload.
+        # slots=True makes __slots__ the field names, in declaration order.
+        return {name: getattr(self, name) for name in self.__slots__}
 
 
-def ask(question: str) -> AgentResponse:
-    """
-    Accept a free-text business question and return a structured answer.
+# ── Lazy classifier import ──────────────────────────────────────────────
+# llm_intent (and, through it, the OpenAI SDK) is only loaded on the first
+# question, so importing the agent stays cheap for CLI / worker start-up.
 
-    >>> resp = ask("What are the best combos for Conut Jnah?")
-    >>> resp.intent
-    'combo'
-    """
-    t0 = time.perf_counter()
+_llm_intent = None
 
-    # 1. Intent classification (LLM-first, regex-fallback)
-    intent: Intent = smart_classify(question)
+
+def _classifier():
+    """Return the ``app.agent.llm_intent`` module, importing it on first use."""
+    global _llm_intent
+    if _llm_intent is None:
+        from app.agent import llm_intent
+        _llm_intent = llm_intent
+    return _llm_intent
+
+
+# ── Intent cache ────────────────────────────────────────────────────────
+# Repeated questions (dashboards, demos, retries) skip the LLM round-trip.
+
+INTENT_CACHE_SIZE = 1024
+
+_intent_cache: OrderedDict[str, Intent] = OrderedDict()
+_intent_cache_lock = threading.Lock()
+
+
+def _normalize(question: str) -> str:
+    """Cache key: lower-cased with whitespace collapsed."""
+    return " ".join(question.lower().split())
+
+
+def _cache_get(key: str) -> Optional[Intent]:
+    with _intent_cache_lock:
+        intent = _intent_cache.get(key)
+        if intent is not None:
+            _intent_cache.move_to_end(key)
+        return intent
+
+
+def _cache_put(key: str, intent: Intent) -> None:
+    # Stored apart from the caller's copy, which it may still mutate
+    intent = replace(intent, matched_keywords=list(intent.matched_keywords))
+    with _intent_cache_lock:
+        _intent_cache[key] = intent
+        _intent_cache.move_to_end(key)
+        if len(_intent_cache) > INTENT_CACHE_SIZE:
+            _intent_cache.popitem(last=False)
+
+
+def _cacheable(intent: Intent) -> bool:
+    """Only cache settled answers: an LLM verdict, or regex when no LLM is configured.
+
+    A regex fallback after an LLM timeout/failure is not cached, so the next
+    ask of the same question gets another chance at the LLM.
+    """
+    return "llm" in intent.matched_keywords or not _classifier().llm_enabled()
+
+
+def _classify(question: str) -> Intent:
+    """``smart_classify`` behind the LRU intent cache."""
+    key = _normalize(question)
+    cached = _cache_get(key)
+    if cached is not None:
+        # Keep the caller's exact wording (chitchat replies echo it); callers
+        # get their own keyword list so mutating it can't reach the cache
+        return replace(cached, raw_question=question,
+                       matched_keywords=list(cached.matched_keywords))
+    intent = _classifier().smart_classify(question)
+    if _cacheable(intent):
+        _cache_put(key, intent)
+    return intent
+
+
+async def _classify_async(question: str) -> Intent:
+    """``smart_classify_async`` behind the LRU intent cache."""
+    key = _normalize(question)
+    cached = _cache_get(key)
+    if cached is not None:
+        return replace(cached, raw_question=question,
+                       matched_keywords=list(cached.matched_keywords))
+    intent = await _classifier().smart_classify_async(question)
+    if _cacheable(intent):
+        _cache_put(key, intent)
+    return intent
+
+
+def _answer(intent: Intent, t0_ns: int, markdown: bool = True) -> AgentResponse:
+    """Dispatch an already-classified question and build the response."""
     logger.info("Intent: %s  branch=%s  conf=%.2f  via=%s",
                 intent.action, intent.branch, intent.confidence,
                 "llm" if "llm" in intent.matched_keywords else "regex")
@@ -57,14 +135,16 @@ def ask(question: str) -> AgentResponse:
     # 2. Dispatch to service
     result = dispatch(intent)
 
-    # 3. Format
+    # 3. Format (skipped when the client renders raw_data itself)
     answer = format_response(
         action=intent.action,
         data=result.get("data"),
         error=result.get("error"),
-    )
+        multi=result.get("multi", False),
+    ) if markdown else ""
 
-    elapsed = (time.perf_counter() - t0) * 1000
+    # integer ns → ms rounded to 0.1 (one integer divide, no float subtraction)
+    elapsed_ms = ((time.perf_counter_ns() - t0_ns) + 50_000) // 100_000 / 10
 
     return AgentResponse(
         intent=intent.action,
@@ -72,6 +152,55 @@ def ask(question: str) -> AgentResponse:
         answer=answer,
         raw_data=result.get("data"),
         error=result.get("error"),
-        elapsed_ms=round(elapsed, 1),
+        elapsed_ms=elapsed_ms,
         confidence=intent.confidence,
     )
+
+
+def ask(question: str, markdown: bool = True) -> AgentResponse:
+    """
+    Accept a free-text business question and return a structured answer.
+
+    With ``markdown=False`` the Markdown rendering step is skipped and
+    ``answer`` is empty — for clients that template ``raw_data`` themselves.
+
+    >>> resp = ask("What are the best combos for Conut Jnah?")
+    >>> resp.intent
+    'combo'
+    """
+    t0_ns = time.perf_counter_ns()
+
+    # 1. Intent classification (LLM-first, regex-fallback)
+    intent: Intent = _classify(question)
+    return _answer(intent, t0_ns, markdown)
+
+
+async def ask_async(question: str, markdown: bool = True) -> AgentResponse:
+    """
+    Coroutine version of ``ask()``.
+
+    The LLM round-trip is awaited instead of blocking, and the CPU-bound
+    service call runs in a worker thread, so many questions can be served
+    concurrently::
+
+        answers = await asyncio.gather(*(ask_async(q) for q in questions))
+    """
+    import asyncio  # already loaded whenever a coroutine is running
+
+    t0_ns = time.perf_counter_ns()
+
+    # 1. Intent classification (LLM-first, regex-fallback)
+    intent: Intent = await _classify_async(question)
+    return await asyncio.to_thread(_answer, intent, t0_ns, markdown)
+
+
+async def stream_chitchat(question: str) -> Optional[Iterator[str]]:
+    """
+    Return the reply as a chunk iterator if *question* is small talk,
+    otherwise ``None`` (the caller should fall back to ``ask_async()``,
+    which then hits the intent cache).
+    """
+    intent: Intent = await _classify_async(question)
+    if intent.action != "chitchat":
+        return None
+    return chitchat_stream(intent)
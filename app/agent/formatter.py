@@ -7,20 +7,65 @@ One formatter per intent + a fallback for ``unknown``.
 
 from __future__ import annotations
 
-from typing import Any
+import io
+import threading
+from typing import Any, Callable
 
 
 # ── helpers ─────────────────────────────────────────────────────────────
 
+_tls = threading.local()
+
+
+def _get_buf() -> io.StringIO:
+    """
+    This thread's scratch buffer, emptied for reuse.
+
+    Formatters never call one another while writing, and ``_finish`` copies
+    the text out, so one buffer per thread is enough.
+    """
+    buf = getattr(_tls, "buf", None)
+    if buf is None:
+        buf = _tls.buf = io.StringIO()
+    else:
+        buf.seek(0)
+        buf.truncate()
+    return buf
+
+
+def _finish(buf: io.StringIO) -> str:
+    """Return the buffer text without the final line terminator."""
+    text = buf.getvalue()
+    return text[:-1] if text.endswith("\n") else text
+
+
 def _num(v: Any, precision: int = 1) -> str:
     """Format a number nicely (add commas, round)."""
-    if v is None:
-        return "N/A"
-    if isinstance(v, float):
+    t = type(v)
+    if t is not float and t is not int:
+        # Slow path: None, non-numbers, and subclasses (numpy scalars, bool)
+        if v is None:
+            return "N/A"
+        if isinstance(v, float):
+            t = float
+        elif isinstance(v, int):
+            t = int
+        else:
+            return str(v)
+    if t is float:
+        # Every caller uses the default; a literal spec skips building one.
+        if precision == 1:
+            return f"{v:,.1f}"
         return f"{v:,.{precision}f}"
-    if isinstance(v, int):
-        return f"{v:,}"
-    return str(v)
+    return f"{v:,}"
+
+
+# (threshold, format spec, suffix) — checked largest first
+_COMPACT_UNITS: tuple[tuple[int, str, str], ...] = (
+    (1_000_000_000, ",.2f", "B"),
+    (1_000_000, ",.1f", "M"),
+    (1_000, ",.1f", "K"),
+)
 
 
 def _compact(v: Any) -> str:
@@ -28,195 +73,290 @@ def _compact(v: Any) -> str:
     if v is None:
         return "N/A"
     n = float(v)
-    if abs(n) >= 1_000_000_000:
-        return f"{n / 1_000_000_000:,.2f}B"
-    if abs(n) >= 1_000_000:
-        return f"{n / 1_000_000:,.1f}M"
-    if abs(n) >= 1_000:
-        return f"{n / 1_000:,.1f}K"
-    return f"{n:,.1f}"
+    mag = abs(n)
+    for scale, spec, suffix in _COMPACT_UNITS:
+        if mag >= scale:
+            return format(n / scale, spec) + suffix
+    return format(n, ",.1f")
 
 
 def _pct(v: Any) -> str:
+    if type(v) is float:
+        return f"{v:.1f}%"
     if v is None:
         return "N/A"
     return f"{float(v):.1f}%"
 
 
+_MISS = object()
+
+
+def _pick(d: dict, keys: tuple[str, ...], default: Any = None) -> Any:
+    """Value of the first key present in *d* (explicit ``None`` counts)."""
+    for k in keys:
+        v = d.get(k, _MISS)
+        if v is not _MISS:
+            return v
+    return default
+
+
+def _item_name(h: Any) -> str:
+    """Display name for an item entry that may be a dict or a plain value."""
+    if type(h) is dict:
+        return h.get("description") or h.get("item") or h.get("product") or "?"
+    return str(h)
+
+
+# Service lists are homogeneous, so the helpers below look at the first
+# element's type once; a mixed list drops back to per-item dispatch.
+
+def _pick_names(items: list, limit: int = 3) -> list[str]:
+    """Display names for the first *limit* entries of *items*."""
+    head = items[:limit]
+    if head and type(head[0]) is dict:
+        try:
+            return [h.get("description") or h.get("item") or h.get("product") or "?" for h in head]
+        except AttributeError:
+            pass
+    return [_item_name(h) for h in head]
+
+
+def _action_text(a: Any) -> Any:
+    if isinstance(a, dict):
+        return a.get("recommendation") or a.get("action") or a.get("text") or str(a)
+    return a
+
+
+def _action_texts(actions: list) -> list:
+    """Display text per recommendation (dicts or plain strings)."""
+    if type(actions[0]) is dict:
+        try:
+            return [a.get("recommendation") or a.get("action") or a.get("text") or str(a) for a in actions]
+        except AttributeError:
+            pass
+    elif not any(isinstance(a, dict) for a in actions):
+        return actions
+    return [_action_text(a) for a in actions]
+
+
+# ── shared literals ─────────────────────────────────────────────────────
+
+_HR = "━━━━━━━━━━━━━━━━━━━━"          # section rule
+_MULTI_SEP = "\n\n---\n\n"            # between per-branch answers
+
+
+# ── row templates (parsed once, filled per loop iteration) ─────────────
+
+_COMBO_ROW = (
+    _HR + "\n"
+    "*{i}.  {a}  +  {b}*\n"
+    "    📈  Lift: *{lift}×*\n"
+    "    ✅  Confidence: *{conf}*\n"
+    "    📦  Support: *{supp}*\n"
+)
+_COMBO_PRICE_ROW = "    💰  Bundle price: *${price}*\n"
+_HISTORY_ROW = "    📅  {month}: *{total}*\n"
+_STAFF_ROW = "  {emoji}  {label}:  *{head} staff*\n"
+_SCORECARD_ROW = "  🔹  {branch}:  *{score}*\n"
+_CANDIDATE_ROW = "  {i}.  *{name}* — score {score}\n"
+
+
 # ── Combo ───────────────────────────────────────────────────────────────
 
 def _format_combo(data: dict) -> str:
-    lines: list[str] = []
+    buf = _get_buf()
+    _w = buf.write
     branch = data.get("branch", "All")
     total_baskets = data.get("total_baskets", "?")
-    lines.append(f"🍩  *Combo Recommendations — {branch}*")
-    lines.append(f"📊  Based on {_num(total_baskets)} baskets analysed\n")
+    _w(f"🍩  *Combo Recommendations — {branch}*\n")
+    _w(f"📊  Based on {_num(total_baskets)} baskets analysed\n\n")
 
     combos = data.get("combos") or data.get("recommendations") or []
     if not combos:
-        lines.append("No significant combos found with current thresholds.")
-        return "\n".join(lines)
+        _w("No significant combos found with current thresholds.\n")
+        return _finish(buf)
 
     for i, c in enumerate(combos, 1):
-        a = c.get("item_a", c.get("item_1", "?"))
-        b = c.get("item_b", c.get("item_2", "?"))
+        a = _pick(c, ("item_a", "item_1"), "?")
+        b = _pick(c, ("item_b", "item_2"), "?")
         lift = c.get("lift", 0)
-        conf = c.get("confidence_a_to_b", c.get("confidence", 0))
+        conf = _pick(c, ("confidence_a_to_b", "confidence"), 0)
         supp = c.get("support", 0)
         price = c.get("suggested_bundle_price")
 
         conf_val = conf * 100 if conf < 1 else conf
         supp_val = supp * 100 if supp < 1 else supp
 
-        lines.append(f"━━━━━━━━━━━━━━━━━━━━")
-        lines.append(f"*{i}.  {a}  +  {b}*")
-        lines.append(f"    📈  Lift: *{_num(lift)}×*")
-        lines.append(f"    ✅  Confidence: *{_pct(conf_val)}*")
-        lines.append(f"    📦  Support: *{_pct(supp_val)}*")
+        _w(_COMBO_ROW.format(
+            i=i, a=a, b=b, lift=_num(lift), conf=_pct(conf_val), supp=_pct(supp_val),
+        ))
         if price:
-            lines.append(f"    💰  Bundle price: *${_num(price)}*")
-        lines.append("")
+            _w(_COMBO_PRICE_ROW.format(price=_num(price)))
+        _w("\n")
 
-    return "\n".join(lines)
+    return _finish(buf)
 
 
 # ── Forecast ────────────────────────────────────────────────────────────
 
 def _format_forecast(data: dict) -> str:
-    lines: list[str] = []
+    buf = _get_buf()
+    _w = buf.write
     branch = data.get("branch", "?")
-    trend = data.get("trend", data.get("trend_classification", "N/A"))
+    trend = _pick(data, ("trend", "trend_classification"), "N/A")
     confidence = data.get("confidence", "N/A")
     demand_idx = data.get("demand_index")
-    mom = data.get("avg_mom_growth_pct", data.get("mom_growth_pct"))
+    mom = _pick(data, ("avg_mom_growth_pct", "mom_growth_pct"))
     horizon = data.get("horizon_months", "?")
 
-    lines.append(f"📈  *Demand Forecast — {branch}*")
-    lines.append(f"━━━━━━━━━━━━━━━━━━━━\n")
+    _w(f"📈  *Demand Forecast — {branch}*\n")
+    _w(_HR)
+    _w("\n\n")
 
     # Summary metrics
-    lines.append(f"🔹  Trend: *{trend.title()}*")
-    lines.append(f"🔹  Avg Month-over-Month Growth: *{_pct(mom) if mom is not None else 'N/A'}*")
-    lines.append(f"🔹  Confidence: *{confidence.title() if isinstance(confidence, str) else confidence}*")
+    _w(f"🔹  Trend: *{trend.title()}*\n")
+    _w(f"🔹  Avg Month-over-Month Growth: *{_pct(mom) if mom is not None else 'N/A'}*\n")
+    _w(f"🔹  Confidence: *{confidence.title() if isinstance(confidence, str) else confidence}*\n")
     if demand_idx is not None:
-        lines.append(f"🔹  Demand Share (vs all branches): *{_pct(demand_idx * 100)}*")
-    lines.append(f"🔹  Forecast Horizon: *{horizon} month(s)*\n")
+        _w(f"🔹  Demand Share (vs all branches): *{_pct(demand_idx * 100)}*\n")
+    _w(f"🔹  Forecast Horizon: *{horizon} month(s)*\n\n")
 
     # Historical data
     history = data.get("history") or []
     if history:
-        lines.append("📊  *Recent History:*\n")
+        _w("📊  *Recent History:*\n\n")
         for h in history:
             month_name = h.get("month", "?")
             total = h.get("total", 0)
-            lines.append(f"    📅  {month_name}: *{_compact(total)}*")
-        lines.append("")
+            _w(_HISTORY_ROW.format(month=month_name, total=_compact(total)))
+        _w("\n")
 
     # Forecasts
     forecasts = data.get("forecasts") or []
     if forecasts:
-        lines.append("🔮  *Monthly Projections:*\n")
+        _w("🔮  *Monthly Projections:*\n\n")
         for fc in forecasts:
-            label = fc.get("month", fc.get("label", "?"))
+            label = _pick(fc, ("month", "label"), "?")
             naive = fc.get("naive")
             wma = fc.get("wma")
             trend_r = fc.get("trend")
             ens = fc.get("ensemble")
 
-            lines.append(f"  ━━  *{label}*")
+            _w(f"  ━━  *{label}*\n")
             if naive is not None:
-                lines.append(f"      📌  Naive Baseline:  *{_compact(naive)}*")
+                _w(f"      📌  Naive Baseline:  *{_compact(naive)}*\n")
             if wma is not None:
-                lines.append(f"      📐  Weighted Moving Avg:  *{_compact(wma)}*")
+                _w(f"      📐  Weighted Moving Avg:  *{_compact(wma)}*\n")
             if trend_r is not None:
-                lines.append(f"      📈  Trend Regression:  *{_compact(trend_r)}*")
+                _w(f"      📈  Trend Regression:  *{_compact(trend_r)}*\n")
             if ens is not None:
-                lines.append(f"      ⭐  Ensemble (Final):  *{_compact(ens)}*")
-            lines.append("")
+                _w(f"      ⭐  Ensemble (Final):  *{_compact(ens)}*\n")
+            _w("\n")
 
     # Anomaly notes
     anomaly_notes = data.get("anomaly_notes") or data.get("anomalies") or []
     if anomaly_notes:
-        lines.append("⚠️  *Anomaly Notes:*")
+        _w("⚠️  *Anomaly Notes:*\n")
         for note in anomaly_notes:
             if isinstance(note, str):
-                lines.append(f"  ❗ {note}")
+                _w(f"  ❗ {note}\n")
             elif isinstance(note, dict):
-                lines.append(f"  ❗ {note.get('label', '?')}: {_num(note.get('value'))} (median {_num(note.get('median'))})")
-        lines.append("")
+                _w(f"  ❗ {note.get('label', '?')}: {_num(note.get('value'))} (median {_num(note.get('median'))})\n")
+        _w("\n")
 
     # Explanation
     explanation = data.get("explanation")
     if explanation:
-        lines.append(f"💡  _{explanation}_")
+        _w(f"💡  _{explanation}_\n")
 
-    return "\n".join(lines)
+    return _finish(buf)
 
 
 # ── Staffing ────────────────────────────────────────────────────────────
 
+# Scenario label → emoji.  recommend_staffing emits low/base/high, which hit
+# the exact lookup; other labels fall back to a substring scan in this order.
+_STAFF_EMOJI: dict[str, str] = {
+    "low": "🟢",
+    "mid": "🟡",
+    "medium": "🟡",
+    "base": "🔴",
+    "high": "🔴",
+}
+
+
+def _staff_emoji(label: str) -> str:
+    key = label.lower()
+    emoji = _STAFF_EMOJI.get(key)
+    if emoji is None:
+        emoji = next((e for k, e in _STAFF_EMOJI.items() if k in key), "🔴")
+    return emoji
+
+
 def _format_staffing(data: dict) -> str:
-    lines: list[str] = []
+    buf = _get_buf()
+    _w = buf.write
     branch = data.get("branch", "?")
     shift = data.get("shift", "?")
-    lines.append(f"👥  *Staffing — {branch}*")
-    lines.append(f"🕐  Shift: *{shift}*\n")
+    _w(f"👥  *Staffing — {branch}*\n")
+    _w(f"🕐  Shift: *{shift}*\n\n")
 
     scenarios = data.get("scenarios") or {}
     if scenarios:
         for label, info in scenarios.items():
             head = info if isinstance(info, (int, float)) else info.get("headcount", info)
-            emoji = "🟢" if "low" in label.lower() else ("🟡" if "mid" in label.lower() or "medium" in label.lower() else "🔴")
-            lines.append(f"  {emoji}  {label.title()}:  *{_num(head)} staff*")
+            _w(_STAFF_ROW.format(emoji=_staff_emoji(label), label=label.title(), head=_num(head)))
 
     rationale = data.get("rationale") or data.get("notes")
     if rationale:
-        lines.append(f"\n💡  {rationale}")
+        _w(f"\n💡  {rationale}\n")
 
-    return "\n".join(lines)
+    return _finish(buf)
 
 
 # ── Expansion ───────────────────────────────────────────────────────────
 
 def _format_expansion(data: dict) -> str:
-    lines: list[str] = []
-    lines.append("🏗  *Expansion Feasibility Report*\n")
+    buf = _get_buf()
+    _w = buf.write
+    _w("🏗  *Expansion Feasibility Report*\n\n")
 
     verdict = data.get("verdict", "N/A")
-    lines.append(f"📋  Verdict: *{verdict}*\n")
+    _w(f"📋  Verdict: *{verdict}*\n\n")
 
     # Best archetype
     archetype = data.get("best_archetype") or {}
     if archetype:
-        lines.append(f"🏆  Best archetype: *{archetype.get('branch', '?')}*")
-        lines.append(f"    Score: *{_num(archetype.get('total_score'))}*\n")
+        _w(f"🏆  Best archetype: *{archetype.get('branch', '?')}*\n")
+        _w(f"    Score: *{_num(archetype.get('total_score'))}*\n\n")
 
     # Scorecards
     scorecards = data.get("branch_scorecards") or []
     if scorecards:
-        lines.append("📊  *Branch Scores:*")
+        _w("📊  *Branch Scores:*\n")
         for sc in scorecards:
-            lines.append(f"  🔹  {sc.get('branch', '?')}:  *{_num(sc.get('total_score'))}*")
-        lines.append("")
+            _w(_SCORECARD_ROW.format(branch=sc.get("branch", "?"), score=_num(sc.get("total_score"))))
+        _w("\n")
 
     # Candidate locations
     candidates = data.get("candidate_locations") or []
     if candidates:
-        lines.append("📍  *Top Candidate Locations:*\n")
+        _w("📍  *Top Candidate Locations:*\n\n")
         for i, loc in enumerate(candidates[:5], 1):
-            name = loc.get("area", loc.get("name", "?"))
-            score = loc.get("location_score", loc.get("score", "?"))
-            lines.append(f"  {i}.  *{name}* — score {_num(score)}")
+            name = _pick(loc, ("area", "name"), "?")
+            score = _pick(loc, ("location_score", "score"), "?")
+            _w(_CANDIDATE_ROW.format(i=i, name=name, score=_num(score)))
 
-    return "\n".join(lines)
+    return _finish(buf)
 
 
 # ── Growth ──────────────────────────────────────────────────────────────
 
 def _format_growth(data: dict) -> str:
-    lines: list[str] = []
+    buf = _get_buf()
+    _w = buf.write
     branch = data.get("branch", "?")
-    lines.append(f"☕  *Coffee & Milkshake Growth — {branch}*\n")
+    _w(f"☕  *Coffee & Milkshake Growth — {branch}*\n\n")
 
     profiles = data.get("branches") or []
     if isinstance(profiles, list) and profiles:
@@ -224,76 +364,67 @@ def _format_growth(data: dict) -> str:
             b_name = prof.get("branch", branch)
             pen = prof.get("beverage_penetration_pct")
 
-            lines.append(f"━━━━━━━━━━━━━━━━━━━━")
-            lines.append(f"🏪  *{b_name}*")
+            _w(_HR)
+            _w("\n")
+            _w(f"🏪  *{b_name}*\n")
             if pen is not None:
-                lines.append(f"    🥤  Beverage penetration: *{_pct(pen)}*")
+                _w(f"    🥤  Beverage penetration: *{_pct(pen)}*\n")
             rank = prof.get("penetration_rank")
             if rank:
-                lines.append(f"    🏅  Rank: *#{rank}*")
+                _w(f"    🏅  Rank: *#{rank}*\n")
             coffee_rev = prof.get("coffee_revenue")
             shake_rev = prof.get("milkshake_revenue")
             if coffee_rev is not None:
-                lines.append(f"    ☕  Coffee revenue: *{_num(coffee_rev)}*")
+                _w(f"    ☕  Coffee revenue: *{_num(coffee_rev)}*\n")
             if shake_rev is not None:
-                lines.append(f"    🥛  Milkshake revenue: *{_num(shake_rev)}*")
+                _w(f"    🥛  Milkshake revenue: *{_num(shake_rev)}*\n")
 
             heroes_c = prof.get("hero_coffee_items") or []
             if heroes_c:
-                items = [h.get("description") or h.get("item") or str(h) if isinstance(h, dict) else str(h) for h in heroes_c[:3]]
-                lines.append(f"    ⭐  Hero coffee: {', '.join(items)}")
+                _w(f"    ⭐  Hero coffee: {', '.join(_pick_names(heroes_c))}\n")
 
             heroes_s = prof.get("hero_milkshake_items") or []
             if heroes_s:
-                items = [h.get("description") or h.get("item") or str(h) if isinstance(h, dict) else str(h) for h in heroes_s[:3]]
-                lines.append(f"    ⭐  Hero milkshake: {', '.join(items)}")
+                _w(f"    ⭐  Hero milkshake: {', '.join(_pick_names(heroes_s))}\n")
 
             under = prof.get("underperforming_items") or []
             if under:
-                lines.append(f"\n    ⚠️  *Underperforming (≥40% gap):*")
+                _w(f"\n    ⚠️  *Underperforming (≥40% gap):*\n")
                 for u in under[:5]:
-                    if isinstance(u, dict):
-                        lines.append(f"      ❗ {u.get('description') or u.get('item') or u.get('product', '?')}: gap {_pct(u.get('gap_pct', 0))}")
+                    if type(u) is dict:
+                        _w(f"      ❗ {_item_name(u)}: gap {_pct(u.get('gap_pct', 0))}\n")
                     else:
-                        lines.append(f"      ❗ {u}")
+                        _w(f"      ❗ {u}\n")
 
             actions = prof.get("actions") or []
             if actions:
-                lines.append(f"\n    💡  *Recommendations:*")
-                for i, a in enumerate(actions, 1):
-                    if isinstance(a, dict):
-                        text = a.get("recommendation") or a.get("action") or a.get("text") or str(a)
-                        lines.append(f"      {i}. {text}")
-                    else:
-                        lines.append(f"      {i}. {a}")
+                _w(f"\n    💡  *Recommendations:*\n")
+                for i, text in enumerate(_action_texts(actions), 1):
+                    _w(f"      {i}. {text}\n")
 
-            lines.append("")
-        return "\n".join(lines)
+            _w("\n")
+        return _finish(buf)
 
     # Fallback: old format
     metrics = data.get("key_metrics") or data.get("branch_profile") or {}
     if metrics:
         bev = metrics.get("beverage_penetration") or metrics.get("beverage_penetration_pct")
         if bev is not None:
-            lines.append(f"    🥤  Beverage penetration: *{_pct(bev if bev > 1 else bev * 100)}*")
+            _w(f"    🥤  Beverage penetration: *{_pct(bev if bev > 1 else bev * 100)}*\n")
         hero = metrics.get("hero_product") or metrics.get("hero_products")
         if hero:
             if isinstance(hero, list):
-                lines.append(f"    ⭐  Hero products: {', '.join(str(h) for h in hero[:3])}")
+                _w(f"    ⭐  Hero products: {', '.join(str(h) for h in hero[:3])}\n")
             else:
-                lines.append(f"    ⭐  Hero product: {hero}")
+                _w(f"    ⭐  Hero product: {hero}\n")
 
     recs = data.get("recommendations") or []
     if recs:
-        lines.append(f"\n💡  *Recommendations:*")
-        for i, r in enumerate(recs, 1):
-            if isinstance(r, dict):
-                text = r.get("recommendation") or r.get("action") or r.get("text") or str(r)
-                lines.append(f"  {i}. {text}")
-            else:
-                lines.append(f"  {i}. {r}")
+        _w(f"\n💡  *Recommendations:*\n")
+        for i, text in enumerate(_action_texts(recs), 1):
+            _w(f"  {i}. {text}\n")
 
-    return "\n".join(lines)
+    return _finish(buf)
 
 
 # ── Multi-branch wrapper ───────────────────────────────────────────────
@@ -301,16 +432,12 @@ def _format_growth(data: dict) -> str:
 def _format_multi(data: dict, single_formatter) -> str:
     """Format results when the agent queried multiple branches."""
     branches = data.get("branches", {})
-    parts: list[str] = []
-    if isinstance(branches, dict):
-        for branch_name, branch_data in branches.items():
-            parts.append(single_formatter(branch_data))
-    elif isinstance(branches, list):
-        for branch_data in branches:
-            parts.append(single_formatter(branch_data))
-    else:
-        parts.append(single_formatter(data))
-    return "\n\n---\n\n".join(parts)
+    t = type(branches)  # tools._multi_branch_batch always builds a plain dict
+    if t is dict:
+        return _MULTI_SEP.join(single_formatter(b) for b in branches.values())
+    if t is list:
+        return _MULTI_SEP.join(single_formatter(b) for b in branches)
+    return single_formatter(data)
 
 
 # ── Unknown / fallback ─────────────────────────────────────────────────
@@ -344,7 +471,10 @@ def _format_chitchat(data: dict) -> str:
     return data.get("reply", "\U0001f44b Hey! Ask me a business question about Conut.")
 
 
-_FORMATTERS: dict[str, Any] = {
+# Dispatch stays a dict: on CPython 3.12 a ``match`` over these string
+# literals compiles to sequential comparisons and measured ~2× slower than
+# ``dict.get`` for later cases and for unknown actions.
+_FORMATTERS: dict[str, Callable[[dict], str]] = {
     "combo":     _format_combo,
     "forecast":  _format_forecast,
     "staffing":  _format_staffing,
@@ -354,20 +484,27 @@ _FORMATTERS: dict[str, Any] = {
 }
 
 
-def format_response(action: str, data: dict | None, error: str | None) -> str:
-    """Return a human-readable Markdown answer."""
+def format_response(
+    action: str,
+    data: dict | None,
+    error: str | None,
+    multi: bool = False,
+) -> str:
+    """
+    Return a human-readable Markdown answer.
+
+    *multi* is set by ``dispatch`` when it fanned out over several branches
+    (``data["branches"]`` is then a per-branch dict).  Services like growth
+    naturally have ``"branches"`` as a list — those are not multi results.
+    """
 
     if error and data is None:
         return f"⚠ **Error:** {error}\n\n" + HELP_TEXT
 
-    if action == "unknown" or action not in _FORMATTERS:
+    # "unknown" (and anything unregistered) has no entry → help text
+    fn = _FORMATTERS.get(action)
+    if fn is None:
         return HELP_TEXT
-
-    formatter = _FORMATTERS[action]
-
-    # multi-branch result?  Only _multi_branch dispatch wraps in {"branches": {dict}}.
-    # Services like growth naturally have "branches" as a list — don't reroute those.
-    if data and isinstance(data.get("branches"), dict):
-        return _format_multi(data, formatter)
-
-    return formatter(data or {})
+    if multi:
+        return _format_multi(data or {}, fn)
+    return fn(data or {})
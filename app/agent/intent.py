@@ -8,11 +8,15 @@ extracts relevant entities (branch, shift, horizon, top_k).
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass, field
-from typing import Optional
+import sys
+from dataclasses import dataclass, field, replace
+from functools import lru_cache, partial
+from typing import Any, Callable, Optional
 
 # ── Known branches (lowercase → canonical) ──────────────────────────────
-BRANCH_ALIASES: dict[str, str] = {
+# Canonical names are interned so every alias (and KNOWN_BRANCHES) shares
+# one object per branch; equality checks downstream hit the identity path.
+BRANCH_ALIASES: dict[str, str] = {alias: sys.intern(name) for alias, name in {
     "conut - tyre":         "Conut - Tyre",
     "conut-tyre":           "Conut - Tyre",
     "conut tyre":           "Conut - Tyre",
@@ -23,11 +27,21 @@ BRANCH_ALIASES: dict[str, str] = {
     "main street":          "Main Street Coffee",
     "msc":                  "Main Street Coffee",
     "conut":                "Conut",          # must come after longer prefixes
-}
+}.items()}
+
+# (alias, canonical) pairs, longest alias first so "conut jnah" wins over "conut"
+_SORTED_ALIASES: tuple[tuple[str, str], ...] = tuple(
+    sorted(BRANCH_ALIASES.items(), key=lambda kv: len(kv[0]), reverse=True)
+)
+
+_ALL_BRANCHES_RE = re.compile(r"\ball\s+branches\b|\bevery\s+branch\b|\beach\s+branch\b")
 
-KNOWN_BRANCHES = ["Conut - Tyre", "Conut Jnah", "Main Street Coffee", "Conut"]
+KNOWN_BRANCHES = tuple(sys.intern(b) for b in ("Conut - Tyre", "Conut Jnah", "Main Street Coffee", "Conut"))
 
-SHIFTS = {"morning", "midday", "evening"}
+# Checked in this order, so "morning vs evening" always resolves the same way
+# (iterating a set would depend on the interpreter's hash seed).
+_SHIFT_ORDER = ("morning", "midday", "evening")
+SHIFTS = frozenset(_SHIFT_ORDER)
 
 # ── Intent definitions ──────────────────────────────────────────────────
 
@@ -104,6 +118,113 @@ INTENT_BOOST: dict[str, list[re.Pattern]] = {
 }
 
 
+def _combine(patterns: list[re.Pattern], flags: int = re.I) -> re.Pattern:
+    """
+    Fold *patterns* into one named-group alternation (``g0|g1|...``).
+
+    A leading ``\\b`` shared by every pattern is hoisted out of the
+    alternation so the engine only tries the branches at word boundaries.
+    """
+    sources = [pat.pattern for pat in patterns]
+    prefix = r"\b" if all(src.startswith(r"\b") for src in sources) else ""
+    if prefix:
+        sources = [src[len(prefix):] for src in sources]
+    body = "|".join(f"(?P<g{i}>{src})" for i, src in enumerate(sources))
+    return re.compile(f"{prefix}(?:{body})", flags)
+
+
+# One alternation per intent: a single C-level scan rejects intents with no
+# keyword at all, which is most of them for any given question.
+_COMBINED: dict[str, re.Pattern] = {
+    intent: _combine(patterns) for intent, patterns in INTENT_PATTERNS.items()
+}
+# Case-sensitive twins for ASCII questions lower-cased up front (the pattern
+# literals are all lower-case); scanning without re.I is noticeably cheaper.
+_COMBINED_LOWER: dict[str, re.Pattern] = {
+    intent: _combine(patterns, 0) for intent, patterns in INTENT_PATTERNS.items()
+}
+
+
+# ── Plain-keyword fast path ─────────────────────────────────────────────
+# Most patterns are just ``\bword\b`` with an optional suffix.  Those are
+# expanded into literal variants and checked with ``str.find`` on the
+# lower-cased question; anything with ``\s``, ``.*`` or ``\d`` stays a regex.
+
+_KEYWORD_TOKEN = re.compile(r"\(\?:([a-z|]+)\)(\??)|\[([- a-z]+)\](\??)|([- a-z])(\??)")
+
+
+def _keyword_variants(source: str) -> Optional[tuple[str, ...]]:
+    """Literal spellings matched by *source*, or None if it needs a regex."""
+    if not (source.startswith(r"\b") and source.endswith(r"\b")):
+        return None
+    body, pos, variants = source[2:-2], 0, [""]
+    while pos < len(body):
+        m = _KEYWORD_TOKEN.match(body, pos)
+        if m is None:
+            return None
+        alts, alt_opt, chars, chars_opt, char, char_opt = m.groups()
+        if alts is not None:
+            options, optional = alts.split("|"), alt_opt
+        elif chars is not None:
+            options, optional = list(chars), chars_opt
+        else:
+            options, optional = [char], char_opt
+        if optional:
+            options.append("")
+        variants = [v + o for v in variants for o in options]
+        pos = m.end()
+    return tuple(dict.fromkeys(variants))
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _has_word(lower: str, words: tuple[str, ...]) -> bool:
+    """True if any of *words* occurs in *lower* on ``\b`` word boundaries."""
+    end_of_text = len(lower)
+    for word in words:
+        start = lower.find(word)
+        while start != -1:
+            end = start + len(word)
+            if (start == 0 or not _is_word_char(lower[start - 1])) and (
+                end == end_of_text or not _is_word_char(lower[end])
+            ):
+                return True
+            start = lower.find(word, start + 1)
+    return False
+
+
+def _lower_matcher(source: str) -> Callable[[str], Any]:
+    """Matcher for *source* on lower-cased ASCII text."""
+    words = _keyword_variants(source)
+    if words is not None:
+        return partial(_has_word, words=words)
+    return re.compile(source).search
+
+
+# intent → ((pattern source, matcher), ...).  _CHECKS runs the re.I patterns
+# on the original text; _CHECKS_LOWER runs on the lower-cased ASCII text.
+_CHECKS: dict[str, tuple[tuple[str, Callable[[str], Any]], ...]] = {
+    intent: tuple((p.pattern, p.search) for p in patterns)
+    for intent, patterns in INTENT_PATTERNS.items()
+}
+_CHECKS_LOWER: dict[str, tuple[tuple[str, Callable[[str], Any]], ...]] = {
+    intent: tuple((p.pattern, _lower_matcher(p.pattern)) for p in patterns)
+    for intent, patterns in INTENT_PATTERNS.items()
+}
+_BOOST_LOWER: dict[str, list[re.Pattern]] = {
+    intent: [re.compile(p.pattern) for p in boosts]
+    for intent, boosts in INTENT_BOOST.items()
+}
+
+# Best achievable score per intent, the denominator for confidence
+_MAX_POSSIBLE: dict[str, float] = {
+    intent: len(patterns) + 0.5 * len(INTENT_BOOST.get(intent, []))
+    for intent, patterns in INTENT_PATTERNS.items()
+}
+
+
 @dataclass
 class Intent:
     """Parsed intent from a user question."""
@@ -118,30 +239,44 @@ class Intent:
 
 
 # ── Entity extraction helpers ───────────────────────────────────────────
+# Pure functions of the question text, memoised so repeated questions (and
+# the LLM path, which re-runs them) skip the scans.
 
+EXTRACT_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=EXTRACT_CACHE_SIZE)
 def _extract_branch(text: str) -> Optional[str]:
     """Return canonical branch name found in *text*, or None."""
-    lower = text.lower()
+    return _branch_in(text.lower())
+
 
+def _branch_in(lower: str) -> Optional[str]:
+    """``_extract_branch`` for text that is already lower-cased."""
     # Check "all branches" explicitly
-    if re.search(r"\ball\s+branches\b|\bevery\s+branch\b|\beach\s+branch\b", lower):
+    if _ALL_BRANCHES_RE.search(lower):
         return "all"
 
-    # Try longest match first (sort aliases by length desc)
-    for alias in sorted(BRANCH_ALIASES, key=len, reverse=True):
+    # Try longest match first
+    for alias, canonical in _SORTED_ALIASES:
         if alias in lower:
-            return BRANCH_ALIASES[alias]
+            return canonical
     return None
 
 
+@lru_cache(maxsize=EXTRACT_CACHE_SIZE)
 def _extract_shift(text: str) -> Optional[str]:
-    lower = text.lower()
-    for s in SHIFTS:
+    return _shift_in(text.lower())
+
+
+def _shift_in(lower: str) -> Optional[str]:
+    for s in _SHIFT_ORDER:
         if s in lower:
             return s
     return None
 
 
+@lru_cache(maxsize=EXTRACT_CACHE_SIZE)
 def _extract_horizon(text: str) -> int:
     m = re.search(r"(?:next|coming|forecast(?:ing)?)\s+(\d{1,2})\s+months?", text, re.I)
     if m:
@@ -152,6 +287,7 @@ def _extract_horizon(text: str) -> int:
     return 3  # default
 
 
+@lru_cache(maxsize=EXTRACT_CACHE_SIZE)
 def _extract_top_k(text: str) -> int:
     m = re.search(r"top\s+(\d{1,2})", text, re.I)
     if m:
@@ -190,25 +326,45 @@ def _is_chitchat(text: str) -> bool:
 
 def classify_intent(question: str) -> Intent:
     """Classify a natural-language question into one of 5 business intents."""
-
-    scores: dict[str, float] = {k: 0.0 for k in INTENT_PATTERNS}
-    matched: dict[str, list[str]] = {k: [] for k in INTENT_PATTERNS}
-
-    for intent, patterns in INTENT_PATTERNS.items():
-        for pat in patterns:
-            if pat.search(question):
-                scores[intent] += 1.0
-                matched[intent].append(pat.pattern)
-
-    # Apply boost patterns (add 0.5 per match)
-    for intent, boosts in INTENT_BOOST.items():
-        for pat in boosts:
-            if pat.search(question):
-                scores[intent] += 0.5
-
-    # Pick best intent
-    best = max(scores, key=scores.get)          # type: ignore[arg-type]
-    best_score = scores[best]
+    cached = _classify_cached(question)
+    # Intent is mutable; hand out a copy so callers can't poison the cache.
+    return replace(cached, matched_keywords=list(cached.matched_keywords))
+
+
+@lru_cache(maxsize=EXTRACT_CACHE_SIZE)
+def _classify_cached(question: str) -> Intent:
+    lower = question.lower()
+    # ASCII lower-cases exactly as re.I folds it, so it can be scanned
+    # case-sensitively.  Other text (e.g. "ſ", "İ") folds differently under
+    # re.I and keeps the original patterns.
+    if question.isascii():
+        text, combined, all_checks, all_boosts = lower, _COMBINED_LOWER, _CHECKS_LOWER, _BOOST_LOWER
+    else:
+        text, combined, all_checks, all_boosts = question, _COMBINED, _CHECKS, INTENT_BOOST
+
+    # Score each intent and keep the running best.  Strict ">" keeps the
+    # first intent on ties, as max() over the dict did.
+    best, best_score, best_matched = "", 0.0, []
+    for intent, checks in all_checks.items():
+        score = 0.0
+        matched: list[str] = []
+        first = combined[intent].search(text)
+        if first is not None:
+            # Patterns overlap, so the alternation can't count them — it only
+            # proves one hit (``lastgroup`` = "g<i>").  The rest are re-checked.
+            hit = int(first.lastgroup[1:])
+            for i, (source, match) in enumerate(checks):
+                if i == hit or match(text):
+                    score += 1.0
+                    matched.append(source)
+
+        # Boost patterns add 0.5 per match (and can carry an intent alone)
+        for pat in all_boosts.get(intent, ()):
+            if pat.search(text):
+                score += 0.5
+
+        if score > best_score:
+            best, best_score, best_matched = intent, score, matched
 
     if best_score == 0:
         # Check for chitchat before calling it unknown
@@ -221,22 +377,22 @@ def classify_intent(question: str) -> Intent:
             )
         return Intent(
             action="unknown",
-            branch=_extract_branch(question),
+            branch=_branch_in(lower),
             confidence=0.0,
             raw_question=question,
         )
 
     # Normalise confidence: score / (number of patterns for that intent)
-    max_possible = len(INTENT_PATTERNS[best]) + 0.5 * len(INTENT_BOOST.get(best, []))
+    max_possible = _MAX_POSSIBLE[best]
     confidence = min(best_score / max_possible, 1.0) if max_possible else 0.0
 
     return Intent(
         action=best,
-        branch=_extract_branch(question),
-        shift=_extract_shift(question),
+        branch=_branch_in(lower),
+        shift=_shift_in(lower),
         horizon_months=_extract_horizon(question),
         top_k=_extract_top_k(question),
         confidence=round(confidence, 3),
-        matched_keywords=matched[best],
+        matched_keywords=best_matched,
         raw_question=question,
     )
@@ -6,7 +6,8 @@ Falls back to the regex-based classifier in ``intent.py`` when:
   - no API key is configured, or
   - the OpenAI call fails for any reason.
 
-A single GPT-4o call is made per question (~100-200 tokens).
+A single GPT-4o call is made per question (~100-200 tokens), or one per
+micro-batch of concurrent questions when ``OPENAI_BATCH_WINDOW_MS`` is set.
 """
 
 from __future__ import annotations
@@ -14,6 +15,13 @@ from __future__ import annotations
 import json
 import logging
 import os
+import random
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
 from typing import Optional
 
 from app.agent.intent import (
@@ -31,141 +39,420 @@ logger = logging.getLogger(__name__)
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 
+
+def _env_float(name: str, default: float) -> float:
+    """Read a numeric setting; a malformed value logs a warning and uses *default*."""
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning("Ignoring %s=%r (not a number); using %s.", name, raw, default)
+        return default
+
+
+# Classification must be quick: cap each call and retry transient failures
+# a couple of times before falling back to regex.
+LLM_TIMEOUT_S = _env_float("OPENAI_TIMEOUT", 5.0)
+LLM_MAX_ATTEMPTS = 3
+# Wall-clock budget for the LLM answer; past it the regex result (computed
+# while the request is in flight) is returned instead.
+LLM_BUDGET_S = _env_float("OPENAI_CLASSIFY_BUDGET", 1.5)
+# Opt-in micro-batching: concurrent questions arriving within this window
+# share one OpenAI request (0 disables it).
+LLM_BATCH_WINDOW_S = _env_float("OPENAI_BATCH_WINDOW_MS", 0.0) / 1000
+LLM_BATCH_MAX = 8
+
 SYSTEM_PROMPT = """\
-You are the intent classifier for **Conut**, a bakery & café chain with 4 branches \
-(Conut, Conut - Tyre, Conut Jnah, Main Street Coffee).
-
-Your job: given a user's natural-language question, determine which of the 5 \
-business objectives it relates to.
-
-═══════════════════════════════════════════════════════════════
-INTENT DEFINITIONS (choose exactly one)
-═══════════════════════════════════════════════════════════════
-
-1. **combo** — anything about product combinations, bundles, pairings, deals, \
-   promotions, cross-selling, upselling, "what goes well together", \
-   "frequently bought together", menu deals, package offers, "2-for-1", \
-   "which items complement each other", "what should we promote together".
-
-2. **forecast** — anything about predicting future sales, demand, revenue, \
-   how busy a branch will be, projections, trends, seasonality, \
-   "what to expect next month", inventory planning, supply chain, \
-   "will we be busy", "predict the futures", "what will sales look like", \
-   "expected performance", "anticipate demand".
-
-3. **staffing** — anything about employees, workers, shifts, schedules, \
-   headcount, "how many people do we need", labor, workforce, roster, \
-   hiring, overtime, "do we need more workers", "who works when", \
-   "Friday night staff", "busy shift coverage".
-
-4. **expansion** — anything about opening new branches/stores/outlets, \
-   entering new markets, feasibility analysis, location scouting, \
-   "should we expand", "where to open next", "new city", "new area", \
-   "is it worth opening", geographic growth, real estate.
-
-5. **growth** — anything about increasing sales of coffee, milkshakes, \
-   beverages, frappes, shakes, drinks strategy, beverage attachment, \
-   product mix improvement, "sell more drinks", "boost coffee sales", \
-   "improve beverage performance", drink menu optimization.
-
-6. **chitchat** — greetings, small talk, casual conversation, thanks, \
-   "hello", "how are you?", "good morning", "thanks", "who are you", \
-   "what can you do", compliments, farewells, jokes, or anything \
-   conversational that is NOT a specific business data question.
-
-7. **unknown** — ONLY when the message is completely incomprehensible \
-   (random characters, empty, or a language you cannot parse). \
-   When in doubt between chitchat and unknown, prefer chitchat.
-
-═══════════════════════════════════════════════════════════════
-RESPONSE FORMAT
-═══════════════════════════════════════════════════════════════
-
-Return ONLY a JSON object:
+Intent classifier for Conut, a bakery/café chain (branches: Conut, Conut - Tyre, \
+Conut Jnah, Main Street Coffee). Pick exactly one intent for the user's message:
+
+combo: bundles, pairings, deals, promotions, cross-/up-selling, items bought or \
+promoted together, menu packages.
+forecast: future sales/demand/revenue, projections, trends, seasonality, how busy \
+a branch will be, inventory or supply planning.
+staffing: employees, shifts, schedules, headcount, labor, roster, hiring, \
+overtime, shift coverage.
+expansion: opening new branches/stores, new markets/cities/areas, feasibility, \
+location scouting, real estate.
+growth: selling more coffee, milkshakes, frappes or other drinks; beverage \
+attachment; drink menu/product mix.
+chitchat: greetings, thanks, small talk, "who are you", "what can you do", \
+jokes, farewells — anything conversational, not a business data question.
+unknown: only incomprehensible input (random characters, empty, unparseable). \
+Prefer chitchat over unknown.
+
+Classify by what the user means, not keywords, and be generous: \
+"Predict the futures of conut tyre" → forecast; "Which products go well together?" → combo; \
+"Do we need more workers?" → staffing; "How can we sell more drinks?" → growth; \
+"Should we enter Tripoli?" → expansion; "what's the weather" → unknown.
+
+Reply with JSON only:
 {"intent": "<combo|forecast|staffing|expansion|growth|chitchat|unknown>", "confidence": <0.0-1.0>}
-
-CRITICAL RULES:
-- Think about what the user REALLY wants, not just keywords.
-- "Predict the futures of conut tyre" → forecast (they mean future sales predictions).
-- "Which products go well together?" → combo.
-- "Do we need more workers?" → staffing.
-- "How can we sell more drinks?" → growth.
-- "Should we enter Tripoli?" → expansion.
-- Be GENEROUS: if it's even loosely related to one intent, classify it. \
-  Only use "unknown" for truly off-topic questions like "what's the weather".
-- Return ONLY the JSON. No explanation, no markdown, no extra text.
 """
 
 
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
 def _get_client():
-    """Lazily create the OpenAI client. Returns None if no key."""
+    """Return the shared OpenAI client, or None if no key is configured."""
     api_key = os.getenv("OPENAI_API_KEY", "").strip()
     if not api_key:
         return None
+    return _client_for_key(api_key)
+
+
+@lru_cache(maxsize=1)
+def _client_for_key(api_key: str):
+    """One client (and HTTP connection pool) per key, reused across calls."""
     try:
         from openai import OpenAI
-        return OpenAI(api_key=api_key)
+        return OpenAI(api_key=api_key, timeout=LLM_TIMEOUT_S, max_retries=0)
     except Exception as exc:
         logger.warning("Failed to create OpenAI client: %s", exc)
         return None
 
 
-def llm_classify(question: str) -> Optional[Intent]:
+def llm_enabled() -> bool:
+    """True when an OpenAI client is configured, i.e. the LLM classifier can run."""
+    return _get_client() is not None
+
+
+# The async client's connection pool belongs to the loop that created it,
+# so keep one per running loop; entries go away with their loop.
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_async_client():
+    """Return the async OpenAI client for the running loop, or None if no key."""
+    api_key = os.getenv("OPENAI_API_KEY", "").strip()
+    if not api_key:
+        return None
+    import asyncio
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is not None and client.api_key == api_key:
+        return client
+    try:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=api_key, timeout=LLM_TIMEOUT_S, max_retries=0)
+    except Exception as exc:
+        logger.warning("Failed to create async OpenAI client: %s", exc)
+        return None
+    _async_clients[loop] = client
+    return client
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Timeouts, connection errors, 429 and 5xx are worth another try."""
+    try:
+        from openai import APIConnectionError, APIStatusError
+    except ImportError:
+        return False
+    if isinstance(exc, APIConnectionError):     # includes APITimeoutError
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter: ~0.5-1s, 1-2s, ..."""
+    return random.uniform(0.5, 1.0) * (2 ** attempt)
+
+
+# Everything but the user message is the same for every request.
+_BASE_KWARGS = {
+    "model": OPENAI_MODEL,
+    "temperature": 0.0,
+    "max_tokens": 60,
+    "response_format": {"type": "json_object"},
+}
+
+
+def _completion_kwargs(question: str) -> dict:
+    """Request parameters shared by the sync and async classifiers."""
+    return {
+        **_BASE_KWARGS,
+        "messages": [_SYSTEM_MESSAGE, {"role": "user", "content": question}],
+    }
+
+
+# The reply is almost always exactly {"intent": "...", "confidence": n}.
+# Anything else (other key order, extra keys, escapes) goes through json.
+_WS = r"[ \t\n\r]*"  # JSON whitespace only; \s would also accept U+00A0 etc.
+_REPLY_RE = re.compile(
+    rf'{_WS}\{{{_WS}"intent"{_WS}:{_WS}"([A-Za-z]*)"{_WS},'
+    rf'{_WS}"confidence"{_WS}:{_WS}(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?){_WS}\}}{_WS}'
+)
+
+
+def _parse_reply(raw: str) -> tuple[str, float]:
+    """Return ``(intent, confidence)`` from the model's JSON reply."""
+    m = _REPLY_RE.fullmatch(raw)
+    if m is not None:
+        return m.group(1), float(m.group(2))
+    parsed = json.loads(raw)
+    return parsed.get("intent", "unknown"), float(parsed.get("confidence", 0.8))
+
+
+def _intent_from_response(response, question: str) -> Intent:
+    """Turn a chat-completion response into an ``Intent``."""
+    raw = response.choices[0].message.content or "{}"
+    action, confidence = _parse_reply(raw)
+    return _build_intent(action, confidence, question)
+
+
+def _build_intent(action: str, confidence: float, question: str) -> Intent:
+    """Validate the model's label/confidence and attach regex-extracted entities."""
+    action = action.lower().strip()
+    if action not in {"combo", "forecast", "staffing", "expansion", "growth", "chitchat", "unknown"}:
+        action = "unknown"
+
+    confidence = max(0.0, min(1.0, confidence))
+
+    # Entity extraction still uses the robust regex helpers
+    return Intent(
+        action=action,
+        branch=_extract_branch(question),
+        shift=_extract_shift(question),
+        horizon_months=_extract_horizon(question),
+        top_k=_extract_top_k(question),
+        confidence=confidence,
+        matched_keywords=["llm"],
+        raw_question=question,
+    )
+
+
+def llm_classify(question: str, deadline: Optional[float] = None) -> Optional[Intent]:
     """
     Classify intent via OpenAI.  Returns None on any failure so the caller
     can fall back to the regex classifier.
+
+    *deadline* (a ``time.monotonic()`` value) is when the caller stops
+    waiting; no request or retry runs past it.
     """
     client = _get_client()
     if client is None:
         return None
 
+    response = _create_with_retries(client, _completion_kwargs(question), deadline)
+    if response is None:
+        return None
     try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": question},
-            ],
-            temperature=0.0,
-            max_tokens=60,
-            response_format={"type": "json_object"},
-        )
-
-        raw = response.choices[0].message.content or "{}"
-        parsed = json.loads(raw)
-
-        action = parsed.get("intent", "unknown").lower().strip()
-        if action not in {"combo", "forecast", "staffing", "expansion", "growth", "chitchat", "unknown"}:
-            action = "unknown"
-
-        confidence = float(parsed.get("confidence", 0.8))
-        confidence = max(0.0, min(1.0, confidence))
-
-        # Entity extraction still uses the robust regex helpers
-        return Intent(
-            action=action,
-            branch=_extract_branch(question),
-            shift=_extract_shift(question),
-            horizon_months=_extract_horizon(question),
-            top_k=_extract_top_k(question),
-            confidence=confidence,
-            matched_keywords=["llm"],
-            raw_question=question,
-        )
-
+        return _intent_from_response(response, question)
     except Exception as exc:
         logger.warning("LLM classify failed (%s), falling back to regex.", exc)
         return None
 
 
+def _create_with_retries(client, kwargs: dict, deadline: Optional[float] = None):
+    """Chat-completion call with retry on transient errors; None on failure.
+
+    With a *deadline*, each attempt's timeout is capped to the time left and
+    no retry starts once it has passed, so a worker whose caller already fell
+    back to regex is freed instead of retrying for nobody.
+    """
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.info("LLM classify budget spent, giving up after %d attempt(s).", attempt)
+                return None
+            kwargs = {**kwargs, "timeout": min(LLM_TIMEOUT_S, remaining)}
+        try:
+            return client.chat.completions.create(**kwargs)
+        except Exception as exc:
+            if attempt + 1 < LLM_MAX_ATTEMPTS and _is_retryable(exc):
+                delay = _backoff_delay(attempt)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    logger.info("LLM classify attempt %d failed (%s), no budget left to retry.",
+                                attempt + 1, exc)
+                    return None
+                logger.info("LLM classify attempt %d failed (%s), retrying in %.1fs.",
+                            attempt + 1, exc, delay)
+                time.sleep(delay)
+                continue
+            logger.warning("LLM classify failed (%s), falling back to regex.", exc)
+            return None
+    return None
+
+
+async def llm_classify_async(question: str) -> Optional[Intent]:
+    """Async twin of ``llm_classify`` – does not block the event loop."""
+    client = _get_async_client()
+    if client is None:
+        return None
+
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        try:
+            response = await client.chat.completions.create(**_completion_kwargs(question))
+            return _intent_from_response(response, question)
+        except Exception as exc:
+            if attempt + 1 < LLM_MAX_ATTEMPTS and _is_retryable(exc):
+                delay = _backoff_delay(attempt)
+                logger.info("LLM classify attempt %d failed (%s), retrying in %.1fs.",
+                            attempt + 1, exc, delay)
+                import asyncio
+                await asyncio.sleep(delay)
+                continue
+            logger.warning("LLM classify failed (%s), falling back to regex.", exc)
+            return None
+    return None
+
+
+# ── Micro-batching ──────────────────────────────────────────────────────
+
+_BATCH_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": SYSTEM_PROMPT + (
+        "\nThe user message holds several numbered messages. Classify each one "
+        "independently and, instead of a single object, reply with:\n"
+        '{"results": [{"intent": "...", "confidence": <0.0-1.0>}, ...]} '
+        "— one entry per message, in the same order.\n"
+    ),
+}
+
+
+def _classify_batch(questions: list[str], deadline: Optional[float] = None) -> list[Optional[Intent]]:
+    """Classify *questions* in one request; None entries on any failure."""
+    client = _get_client()
+    if client is None:
+        return [None] * len(questions)
+
+    numbered = "\n".join(f"{i}) {' '.join(q.split())}" for i, q in enumerate(questions, 1))
+    kwargs = {
+        **_BASE_KWARGS,
+        "max_tokens": 30 * len(questions),
+        "messages": [_BATCH_SYSTEM_MESSAGE, {"role": "user", "content": numbered}],
+    }
+    response = _create_with_retries(client, kwargs, deadline)
+    if response is None:
+        return [None] * len(questions)
+    try:
+        results = json.loads(response.choices[0].message.content or "{}")["results"]
+        if len(results) != len(questions):
+            raise ValueError(f"expected {len(questions)} results, got {len(results)}")
+        return [
+            _build_intent(r.get("intent", "unknown"), float(r.get("confidence", 0.8)), q)
+            for r, q in zip(results, questions)
+        ]
+    except Exception as exc:
+        logger.warning("LLM batch reply unusable (%s), falling back to regex.", exc)
+        return [None] * len(questions)
+
+
+class _Batcher:
+    """
+    Coalesces concurrent ``llm_classify`` calls.
+
+    The first question opens a window of *window_s*; questions arriving
+    before it closes (or until *max_size* are queued) are sent together.
+    A batch of one goes through the normal single-question prompt.
+    """
+
+    def __init__(self, window_s: float, max_size: int, pool: ThreadPoolExecutor):
+        self._window_s = window_s
+        self._max_size = max_size
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, Future, Optional[float]]] = []
+        self._timer: Optional[threading.Timer] = None
+
+    def submit(self, question: str, deadline: Optional[float] = None) -> Future:
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((question, future, deadline))
+            if len(self._pending) >= self._max_size:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._window_s, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def _flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._pool.submit(self._run, batch)
+
+    @staticmethod
+    def _run(batch: list[tuple[str, Future, Optional[float]]]) -> None:
+        questions = [q for q, _, _ in batch]
+        # Keep going while any caller in the batch is still waiting
+        deadlines = [d for _, _, d in batch]
+        deadline = None if None in deadlines else max(deadlines)
+        try:
+            if len(questions) == 1:
+                results = [llm_classify(questions[0], deadline)]
+            else:
+                results = _classify_batch(questions, deadline)
+        except Exception as exc:
+            logger.warning("LLM batch failed (%s), falling back to regex.", exc)
+            results = [None] * len(questions)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+
+# Shared by all smart_classify callers; requests are capped to the caller's
+# budget, so a call that overruns it frees its worker at the deadline.
+_llm_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-classify")
+_batcher = _Batcher(LLM_BATCH_WINDOW_S, LLM_BATCH_MAX, _llm_pool)
+
+
 def smart_classify(question: str) -> Intent:
     """
     Try LLM first, fall back to regex.
 
+    The regex classifier runs while the LLM request is in flight, so a slow
+    or failed call costs at most ``LLM_BUDGET_S``.
+
     This is the function that ``agent.py`` should call instead of
     ``classify_intent`` directly.
     """
-    llm_result = llm_classify(question)
+    if _get_client() is None:
+        logger.info("No LLM available, using regex classifier.")
+        return regex_classify(question)
+
+    deadline = time.monotonic() + LLM_BUDGET_S
+    if LLM_BATCH_WINDOW_S > 0:
+        future = _batcher.submit(question, deadline)
+    else:
+        future = _llm_pool.submit(llm_classify, question, deadline)
+    fallback = regex_classify(question)
+    try:
+        llm_result = future.result(timeout=LLM_BUDGET_S)
+    except FutureTimeout:
+        logger.info("LLM classify exceeded %.1fs budget, using regex classifier.", LLM_BUDGET_S)
+        return fallback
+    if llm_result is not None:
+        logger.info("LLM classified as: %s (conf=%.2f)", llm_result.action, llm_result.confidence)
+        return llm_result
+
+    logger.info("No LLM available, using regex classifier.")
+    return fallback
+
+
+async def smart_classify_async(question: str) -> Intent:
+    """
+    Async variant of ``smart_classify`` so many questions can be classified
+    concurrently (e.g. ``asyncio.gather``) instead of one round-trip at a time.
+    """
+    import asyncio
+    try:
+        llm_result = await asyncio.wait_for(llm_classify_async(question), LLM_BUDGET_S)
+    except asyncio.TimeoutError:
+        logger.info("LLM classify exceeded %.1fs budget, using regex classifier.", LLM_BUDGET_S)
+        llm_result = None
     if llm_result is not None:
         logger.info("LLM classified as: %s (conf=%.2f)", llm_result.action, llm_result.confidence)
         return llm_result
@@ -4,72 +4,246 @@ Tool wrappers – thin adapters around each of the 5 business-objective services
 Every wrapper returns a standardised dict:
     {"success": bool, "data": <service_result | None>, "error": <str | None>}
 
+Multi-branch fan-outs additionally set ``"multi": True`` so the formatter
+knows ``data["branches"]`` is a per-branch mapping without inspecting it.
+
 The ``dispatch`` function maps an Intent to the correct wrapper.
 """
 
 from __future__ import annotations
 
-import traceback
-from typing import Any
+import functools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Iterator
+
+# The base of fastapi's HTTPException, without importing all of fastapi
+from starlette.exceptions import HTTPException
 
 from app.agent.intent import Intent, KNOWN_BRANCHES
+from app.core.config import data_version as _data_version
+
+logger = logging.getLogger(__name__)
+
+
+# ── Result cache ────────────────────────────────────────────────────────
+
+def _is_client_error(exc: BaseException) -> bool:
+    """A 4xx ``HTTPException``: the branch/shift was bad, the service was not."""
+    return isinstance(exc, HTTPException) and 400 <= exc.status_code < 500
+
+
+def _has_failures(result: Any) -> bool:
+    """True for a batch result where some branch failed unexpectedly.
+
+    A 4xx (e.g. a branch with no attendance data) is a settled answer and
+    doesn't count; anything else may succeed on the next call.
+    """
+    return isinstance(result, dict) and any(
+        isinstance(v, BaseException) and not _is_client_error(v) for v in result.values()
+    )
+
+
+def ttl_cache(maxsize: int = 128, ttl: float = 300):
+    """LRU-cache a service wrapper's result per kwargs for *ttl* seconds.
+
+    Concurrent misses on the same key are coalesced (single-flight): the
+    first caller computes, the rest wait on its Future instead of running
+    the same pandas pipeline again.
+
+    Exceptions are not cached, nor are batch results holding an unexpected
+    per-branch exception or 5xx (the next call retries the failed branch).  Cached dicts are shared between callers, so
+    they must be treated as read-only (the formatters only read them).
+    """
+    def decorator(fn):
+        cache: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        inflight: dict[tuple, Future] = {}
+        lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def wrapper(**kwargs):
+            key = (_data_version(), *sorted(kwargs.items()))
+            now = time.monotonic()
+            with lock:
+                hit = cache.get(key)
+                if hit is not None and hit[0] > now:
+                    cache.move_to_end(key)
+                    return hit[1]
+                pending = inflight.get(key)
+                if pending is None:
+                    pending = inflight[key] = Future()
+                    leader = True
+                else:
+                    leader = False
+            if not leader:
+                return pending.result()
+
+            try:
+                result = fn(**kwargs)
+            except BaseException as exc:
+                with lock:
+                    del inflight[key]
+                pending.set_exception(exc)
+                raise
+            with lock:
+                if not _has_failures(result):
+                    cache[key] = (now + ttl, result)
+                    cache.move_to_end(key)
+                    while len(cache) > maxsize:
+                        cache.popitem(last=False)
+                del inflight[key]
+            pending.set_result(result)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
 
 
 # ── Lazy service imports (avoid circular / heavy load at parse time) ────
 
+_SERVICE_FNS: dict[str, Callable[..., dict]] = {}
+_services_lock = threading.Lock()
+
+
+def _load_services() -> dict[str, Callable[..., dict]]:
+    """Import the service entry points once and cache them in _SERVICE_FNS."""
+    if not _SERVICE_FNS:
+        with _services_lock:
+            if not _SERVICE_FNS:
+                from app.services.combo_service import recommend_combos, recommend_combos_batch
+                from app.services.expansion_service import evaluate_expansion
+                from app.services.forecast_service import (
+                    forecast_branch_demand, forecast_branch_demand_batch,
+                )
+                from app.services.growth_service import growth_strategy
+                from app.services.staffing_service import recommend_staffing, recommend_staffing_batch
+                _SERVICE_FNS.update(
+                    combo=recommend_combos,
+                    combo_batch=recommend_combos_batch,
+                    forecast=forecast_branch_demand,
+                    forecast_batch=forecast_branch_demand_batch,
+                    staffing=recommend_staffing,
+                    staffing_batch=recommend_staffing_batch,
+                    expansion=evaluate_expansion,
+                    growth=growth_strategy,
+                )
+    return _SERVICE_FNS
+
+
+@ttl_cache(maxsize=128, ttl=300)
 def _combo(branch: str, top_k: int) -> dict:
-    from app.services.combo_service import recommend_combos
-    return recommend_combos(branch=branch, top_k=top_k)
+    return (_SERVICE_FNS or _load_services())["combo"](branch=branch, top_k=top_k)
 
 
+@ttl_cache(maxsize=128, ttl=300)
 def _forecast(branch: str, horizon: int) -> dict:
-    from app.services.forecast_service import forecast_branch_demand
-    return forecast_branch_demand(branch=branch, horizon_months=horizon)
+    return (_SERVICE_FNS or _load_services())["forecast"](branch=branch, horizon_months=horizon)
 
 
+@ttl_cache(maxsize=128, ttl=300)
 def _staffing(branch: str, shift: str) -> dict:
-    from app.services.staffing_service import recommend_staffing
-    return recommend_staffing(branch=branch, shift=shift)
+    return (_SERVICE_FNS or _load_services())["staffing"](branch=branch, shift=shift)
+
+
+# Batch variants load the data once for all branches and return
+# {branch: result | exception}; see _multi_branch_batch.
+
+@ttl_cache(maxsize=128, ttl=300)
+def _combo_batch(branches: tuple[str, ...], top_k: int) -> dict:
+    return (_SERVICE_FNS or _load_services())["combo_batch"](list(branches), top_k=top_k)
+
 
+@ttl_cache(maxsize=128, ttl=300)
+def _forecast_batch(branches: tuple[str, ...], horizon: int) -> dict:
+    return (_SERVICE_FNS or _load_services())["forecast_batch"](list(branches), horizon_months=horizon)
 
+
+@ttl_cache(maxsize=128, ttl=300)
+def _staffing_batch(branches: tuple[str, ...], shift: str) -> dict:
+    return (_SERVICE_FNS or _load_services())["staffing_batch"](list(branches), shift=shift)
+
+
+@ttl_cache(maxsize=128, ttl=300)
 def _expansion(branch: str) -> dict:
-    from app.services.expansion_service import evaluate_expansion
-    return evaluate_expansion(branch=branch)
+    return (_SERVICE_FNS or _load_services())["expansion"](branch=branch)
 
 
+@ttl_cache(maxsize=128, ttl=300)
 def _growth(branch: str) -> dict:
-    from app.services.growth_service import growth_strategy
-    return growth_strategy(branch=branch)
+    return (_SERVICE_FNS or _load_services())["growth"](branch=branch)
 
 
 # ── Standardised wrapper ───────────────────────────────────────────────
 
+def _log_failure(fn, exc: BaseException, branch: str | None = None) -> str | None:
+    """Log a service failure; return its correlation id, or None for a 4xx.
+
+    A 4xx (unknown branch, bad shift) is the caller's mistake: one INFO
+    line, no traceback, no id.  Anything else is logged at ERROR with the
+    traceback under a fresh correlation id.
+    """
+    service = getattr(fn, "__name__", repr(fn)).lstrip("_")
+    where = f" for {branch}" if branch else ""
+    if _is_client_error(exc):
+        logger.info("Service %s rejected request%s: %s", service, where, exc,
+                    extra={"service": service, "branch": branch})
+        return None
+    cid = uuid.uuid4().hex[:12]
+    logger.error("Service %s failed%s (cid=%s)", service, where, cid, exc_info=exc,
+                 extra={"cid": cid, "service": service, "branch": branch})
+    return cid
+
+
+def _failure_message(exc: BaseException, cid: str | None) -> str:
+    """User-facing error text; carries the correlation id when there is one."""
+    msg = f"{type(exc).__name__}: {exc}"
+    return f"{msg} (cid={cid})" if cid else msg
+
+
 def _safe_call(fn, **kwargs) -> dict[str, Any]:
-    """Call *fn* and wrap result in standard envelope."""
+    """Call *fn* and wrap result in standard envelope.
+
+    On an unexpected failure the traceback goes to the server log under a
+    short correlation id; the envelope (and the user-facing error) carries
+    only the message and that id.  A 4xx gets just its message.
+    """
     try:
         data = fn(**kwargs)
         return {"success": True, "data": data, "error": None}
     except Exception as exc:
-        return {
-            "success": False,
-            "data": None,
-            "error": f"{type(exc).__name__}: {exc}",
-            "traceback": traceback.format_exc(),
-        }
+        cid = _log_failure(fn, exc)
+        res = {"success": False, "data": None, "error": _failure_message(exc, cid)}
+        if cid:
+            res["cid"] = cid
+        return res
 
 
 # ── Multi-branch helper ────────────────────────────────────────────────
 
-def _multi_branch(fn, branches: list[str], **extra) -> dict[str, Any]:
-    """Run *fn* for every branch and merge results."""
+def _multi_branch_batch(batch_fn, branches: tuple[str, ...], **extra) -> dict[str, Any]:
+    """Run *batch_fn* once for every branch and merge results.
+
+    The service loads and filters its data a single time; a branch that
+    failed comes back as its exception, is logged like ``_safe_call`` and
+    is reported in ``error`` (with its correlation id unless it is a 4xx).
+    """
+    res = _safe_call(batch_fn, branches=branches, **extra)
+    if not res["success"]:
+        return {"success": False, "data": None, "error": res["error"]}
+
     results: dict[str, Any] = {}
     errors: list[str] = []
     for b in branches:
-        res = _safe_call(fn, branch=b, **extra)
-        if res["success"]:
-            results[b] = res["data"]
+        data = res["data"][b]
+        if isinstance(data, Exception):
+            errors.append(f"{b}: {_failure_message(data, _log_failure(batch_fn, data, branch=b))}")
         else:
-            errors.append(f"{b}: {res['error']}")
+            results[b] = data
 
     if not results:
         return {"success": False, "data": None, "error": "; ".join(errors)}
@@ -77,6 +251,7 @@ def _multi_branch(fn, branches: list[str], **extra) -> dict[str, Any]:
         "success": True,
         "data": {"branches": results},
         "error": "; ".join(errors) if errors else None,
+        "multi": True,
     }
 
 
@@ -96,79 +271,102 @@ _STATIC_CHITCHAT = (
 )
 
 
-def _chitchat_reply(intent: Intent) -> str:
-    """Generate a friendly conversational reply using GPT-4o, with a static fallback."""
-    import os, json, logging as _log
-    api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    if api_key:
+_CHITCHAT_SYSTEM_MESSAGE = {"role": "system", "content": (
+    "You are the friendly AI assistant for Conut, a bakery & cafe chain "
+    "with 4 branches in Lebanon. You handle greetings and small talk warmly. "
+    "Keep replies short (2-3 sentences max), friendly, and always gently "
+    "remind the user you can help with: combo optimization, demand forecasting, "
+    "staffing, expansion feasibility, and coffee/milkshake growth strategies. "
+    "Use a few emojis to keep it fun. Never use markdown headers."
+)}
+
+# Everything but the model and the user turn is fixed, so build it once
+_CHITCHAT_KWARGS = {
+    "temperature": 0.8,
+    "max_tokens": 150,
+    "stream": True,
+}
+
+
+def chitchat_stream(intent: Intent) -> Iterator[str]:
+    """Yield a small-talk reply chunk by chunk as the LLM generates it.
+
+    Falls back to the static greeting when no client is configured or the
+    call fails before anything was produced.
+    """
+    # Imported here so loading the agent doesn't pull in the OpenAI client
+    from app.agent.llm_intent import OPENAI_MODEL, _get_client
+
+    client = _get_client()
+    sent = False
+    if client is not None:
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
-            resp = client.chat.completions.create(
-                model=os.getenv("OPENAI_MODEL", "gpt-4o"),
+            stream = client.chat.completions.create(
+                **_CHITCHAT_KWARGS,
+                model=OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": (
-                        "You are the friendly AI assistant for Conut, a bakery & cafe chain "
-                        "with 4 branches in Lebanon. You handle greetings and small talk warmly. "
-                        "Keep replies short (2-3 sentences max), friendly, and always gently "
-                        "remind the user you can help with: combo optimization, demand forecasting, "
-                        "staffing, expansion feasibility, and coffee/milkshake growth strategies. "
-                        "Use a few emojis to keep it fun. Never use markdown headers."
-                    )},
+                    _CHITCHAT_SYSTEM_MESSAGE,
                     {"role": "user", "content": intent.raw_question or "hello"},
                 ],
-                temperature=0.8,
-                max_tokens=150,
             )
-            return resp.choices[0].message.content or _STATIC_CHITCHAT
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    sent = True
+                    yield delta
         except Exception as exc:
-            _log.getLogger(__name__).warning("Chitchat LLM failed: %s", exc)
-    return _STATIC_CHITCHAT
+            logger.warning("Chitchat LLM failed: %s", exc)
+    if not sent:
+        yield _STATIC_CHITCHAT
+
+
+def _chitchat_reply(intent: Intent) -> str:
+    """Generate a friendly conversational reply using GPT-4o, with a static fallback."""
+    return "".join(chitchat_stream(intent))
+
+
+# Services queried per branch: action → (wrapper, batch wrapper, extra kwargs from intent)
+_PER_BRANCH: dict[str, Callable[[Intent], tuple[Callable[..., dict], Callable[..., dict], dict[str, Any]]]] = {
+    "combo":    lambda i: (_combo, _combo_batch, {"top_k": i.top_k}),
+    "forecast": lambda i: (_forecast, _forecast_batch, {"horizon": i.horizon_months}),
+    "staffing": lambda i: (_staffing, _staffing_batch, {"shift": i.shift or DEFAULT_SHIFT}),
+}
 
 
 def dispatch(intent: Intent) -> dict[str, Any]:
-    """Route an Intent to the correct service and return a wrapped result."""
+    """Route an Intent to the correct service and return a wrapped result.
+
+    Reentrant: the result depends only on *intent* (which is never
+    mutated), and the services only read DataFrames that their
+    ``lru_cache`` loaders finished building — all column fixes happen inside
+    the loaders, and pandas copy-on-write keeps derived frames from writing
+    back.  Concurrent ``/chat`` requests may therefore dispatch from any
+    thread; the shared caches here are lock-protected.
+    """
 
     branch = intent.branch
-    branches_to_query = (
-        KNOWN_BRANCHES if branch == "all" else
-        [branch] if branch else
-        KNOWN_BRANCHES            # default → all when branch not mentioned
-    )
+    # None → every branch ("all", or no branch mentioned)
+    single = branch if branch and branch != "all" else None
 
     action = intent.action
 
-    # ── combo ───────────────────────────────────────────────────────────
-    if action == "combo":
-        if len(branches_to_query) == 1:
-            return _safe_call(_combo, branch=branches_to_query[0], top_k=intent.top_k)
-        return _multi_branch(_combo, branches_to_query, top_k=intent.top_k)
-
-    # ── forecast ────────────────────────────────────────────────────────
-    if action == "forecast":
-        if len(branches_to_query) == 1:
-            return _safe_call(_forecast, branch=branches_to_query[0], horizon=intent.horizon_months)
-        return _multi_branch(_forecast, branches_to_query, horizon=intent.horizon_months)
-
-    # ── staffing ────────────────────────────────────────────────────────
-    if action == "staffing":
-        shift = intent.shift or DEFAULT_SHIFT
-        if len(branches_to_query) == 1:
-            return _safe_call(_staffing, branch=branches_to_query[0], shift=shift)
-        return _multi_branch(_staffing, branches_to_query, shift=shift)
+    # ── combo / forecast / staffing ─────────────────────────────────────
+    per_branch = _PER_BRANCH.get(action)
+    if per_branch is not None:
+        fn, batch_fn, extra = per_branch(intent)
+        if single is not None:
+            return _safe_call(fn, branch=single, **extra)
+        return _multi_branch_batch(batch_fn, KNOWN_BRANCHES, **extra)
 
     # ── expansion ───────────────────────────────────────────────────────
     if action == "expansion":
         # expansion already handles "" as "all branches"
-        b = branches_to_query[0] if len(branches_to_query) == 1 else ""
-        return _safe_call(_expansion, branch=b)
+        return _safe_call(_expansion, branch=single or "")
 
     # ── growth ──────────────────────────────────────────────────────────
     if action == "growth":
         # growth_strategy handles "all" internally, so pass directly
-        if len(branches_to_query) == 1:
-            return _safe_call(_growth, branch=branches_to_query[0])
-        return _safe_call(_growth, branch="all")
+        return _safe_call(_growth, branch=single or "all")
 
     # ── chitchat ────────────────────────────────────────────────────────
     if action == "chitchat":
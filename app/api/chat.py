@@ -7,24 +7,43 @@ backed by the 5 business-objective analytics services.
 
 from __future__ import annotations
 
+import json
+from typing import Iterator
+
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 
-from app.agent.agent import ask
+from app.agent.agent import ask_async, stream_chitchat
 from app.schemas.chat import ChatRequest, ChatResponse
 
 router = APIRouter()
 
 
 @router.post("/chat", response_model=ChatResponse)
-def chat(body: ChatRequest) -> ChatResponse:
+async def chat(body: ChatRequest) -> dict | StreamingResponse:
     """Ask the Conut Chief-of-Operations Agent a business question."""
-    resp = ask(body.question)
-    return ChatResponse(
-        intent=resp.intent,
-        branch=resp.branch,
-        answer=resp.answer,
-        confidence=resp.confidence,
-        elapsed_ms=resp.elapsed_ms,
-        data=resp.raw_data,
-        error=resp.error,
-    )
+    if body.stream:
+        chunks = await stream_chitchat(body.question)
+        if chunks is not None:
+            return StreamingResponse(_sse(chunks), media_type="text/event-stream")
+    # The LLM call is awaited and the pandas work runs in a worker thread,
+    # so a slow OpenAI round-trip no longer pins a threadpool slot.
+    resp = await ask_async(body.question, markdown=body.format == "markdown")
+    # A plain dict: FastAPI validates it against response_model once, instead
+    # of building a ChatResponse here and dumping/re-validating it after.
+    return {
+        "intent": resp.intent,
+        "branch": resp.branch,
+        "answer": resp.answer,
+        "confidence": resp.confidence,
+        "elapsed_ms": resp.elapsed_ms,
+        "data": resp.raw_data,
+        "error": resp.error,
+    }
+
+
+def _sse(chunks: Iterator[str]) -> Iterator[str]:
+    """Wrap reply chunks as SSE events (JSON-encoded so newlines survive)."""
+    for chunk in chunks:
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
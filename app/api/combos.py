@@ -1,5 +1,6 @@
-﻿from fastapi import APIRouter
+﻿from fastapi import APIRouter, Request, Response
 
+from app.core.etag import not_modified, request_etag
 from app.schemas.combos import (
     ComboCompareRequest,
     ComboCompareResponse,
@@ -13,8 +14,12 @@ router = APIRouter()
 
 
 @router.post("/combo", response_model=ComboResponse)
-def combo(request: ComboRequest) -> ComboResponse:
+def combo(request: ComboRequest, http: Request, response: Response) -> ComboResponse:
     """Return top-K co-purchased item pairs for a branch (basket analysis)."""
+    etag = request_etag(http, request)
+    if (cached := not_modified(http, etag)) is not None:
+        return cached
+    response.headers["ETag"] = etag
     return recommend_combos(
         branch=request.branch,
         top_k=request.top_k,
@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
+from app.core.etag import not_modified, request_etag
 from app.schemas.expansion import ExpansionRequest, ExpansionResponse
 from app.services.expansion_service import evaluate_expansion
 
@@ -8,8 +9,11 @@ router = APIRouter()
 
 
 @router.post("/expansion", response_model=ExpansionResponse)
-def expansion(request: ExpansionRequest) -> ExpansionResponse:
+def expansion(request: ExpansionRequest, http: Request, response: Response) -> ExpansionResponse:
     """Evaluate expansion feasibility and recommend candidate locations."""
+    etag = request_etag(http, request)
+    if (cached := not_modified(http, etag)) is not None:
+        return cached
     result = evaluate_expansion(request.branch)
 
     # If the service returned an error dict (unknown branch), raise 404
@@ -17,4 +21,5 @@ def expansion(request: ExpansionRequest) -> ExpansionResponse:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail=result)
 
+    response.headers["ETag"] = etag
     return result
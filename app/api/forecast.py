@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 
+from app.core.etag import not_modified, request_etag
 from app.schemas.forecast import ForecastRequest, ForecastResponse
 from app.services.forecast_service import forecast_branch_demand
 
@@ -8,8 +9,12 @@ router = APIRouter()
 
 
 @router.post("/forecast", response_model=ForecastResponse)
-def forecast(request: ForecastRequest):
+def forecast(request: ForecastRequest, http: Request, response: Response):
+    etag = request_etag(http, request)
+    if (cached := not_modified(http, etag)) is not None:
+        return cached
     result = forecast_branch_demand(request.branch, request.horizon_months)
     if "error" in result and result["error"]:
         raise HTTPException(status_code=404, detail=result["error"])
+    response.headers["ETag"] = etag
     return result
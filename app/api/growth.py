@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
+from app.core.etag import not_modified, request_etag
 from app.schemas.growth import GrowthRequest, GrowthResponse
 from app.services.growth_service import growth_strategy
 
@@ -8,5 +9,9 @@ router = APIRouter()
 
 
 @router.post("/growth-strategy", response_model=GrowthResponse)
-def growth(request: GrowthRequest) -> GrowthResponse:
+def growth(request: GrowthRequest, http: Request, response: Response) -> GrowthResponse:
+    etag = request_etag(http, request)
+    if (cached := not_modified(http, etag)) is not None:
+        return cached
+    response.headers["ETag"] = etag
     return growth_strategy(request.branch)
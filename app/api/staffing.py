@@ -1,12 +1,12 @@
 from fastapi import APIRouter
 
-from app.schemas.staffing import StaffingRequest
+from app.schemas.staffing import StaffingRequest, StaffingResponse
 from app.services.staffing_service import recommend_staffing
 
 
 router = APIRouter()
 
 
-@router.post("/staffing")
-def staffing(request: StaffingRequest) -> dict:
+@router.post("/staffing", response_model=StaffingResponse)
+def staffing(request: StaffingRequest) -> StaffingResponse:
     return recommend_staffing(request.branch, request.shift)
@@ -1,12 +1,61 @@
+import os
+import threading
+import time
+from collections.abc import Callable
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
-# Load .env file so OPENAI_API_KEY (and others) are available via os.getenv
-try:
-    from dotenv import load_dotenv
-    load_dotenv(PROJECT_ROOT / ".env")
-except ImportError:
-    pass  # python-dotenv is optional
+# Load .env file so OPENAI_API_KEY (and others) are available via os.getenv.
+# Skipped (dotenv never imported) when there is no .env.  Variables already
+# set in the environment (e.g. injected by a container) win: load_dotenv
+# does not override them.
+_ENV_FILE = PROJECT_ROOT / ".env"
+if _ENV_FILE.exists():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_ENV_FILE)
+    except ImportError:
+        pass  # python-dotenv is optional
 
 PROCESSED_DATA_DIR = PROJECT_ROOT / "data" / "processed"
+
+# Bumped whenever a file under data/processed changes.  The service loaders
+# are process-lifetime lru_caches, so a bump also clears every cache
+# registered with ``on_data_change``; the agent's TTL cache and the ETags key
+# on the version itself.  The directory is re-scanned at most once every
+# DATA_CHECK_INTERVAL_S, so hot lookups don't each pay a scandir + stat.
+DATA_VERSION = 0
+DATA_CHECK_INTERVAL_S = 1.0
+_data_mtime = 0
+_data_checked = float("-inf")
+_data_lock = threading.Lock()
+_data_caches: list[Callable[[], None]] = []
+
+
+def on_data_change(fn):
+    """Decorator: clear the lru_cache'd *fn* whenever processed data changes."""
+    _data_caches.append(fn.cache_clear)
+    return fn
+
+
+def data_version() -> int:
+    """Return DATA_VERSION, bumping it if any processed file's mtime moved."""
+    global DATA_VERSION, _data_mtime, _data_checked
+    now = time.monotonic()
+    if now - _data_checked < DATA_CHECK_INTERVAL_S:
+        return DATA_VERSION
+    with _data_lock:
+        if now - _data_checked < DATA_CHECK_INTERVAL_S:
+            return DATA_VERSION
+        _data_checked = now
+        try:
+            mtime = max(e.stat().st_mtime_ns for e in os.scandir(PROCESSED_DATA_DIR))
+        except (OSError, ValueError):
+            return DATA_VERSION
+        if mtime != _data_mtime:
+            for cache_clear in _data_caches:
+                cache_clear()
+            _data_mtime = mtime
+            DATA_VERSION += 1
+        return DATA_VERSION
@@ -0,0 +1,37 @@
+"""
+Conditional requests for the analytics endpoints.
+
+The ETag is derived from the route, the validated request body and the
+processed-data version, so a repeat query is answered with ``304 Not
+Modified`` *before* the service runs — no pandas work, no payload.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.config import data_version
+
+
+def request_etag(request: Request, body: BaseModel) -> str:
+    """Strong ETag for *body* posted to this route under the current data."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(request.url.path.encode())
+    h.update(body.model_dump_json().encode())
+    h.update(str(data_version()).encode())
+    return f'"{h.hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already holds *etag*, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -21,13 +21,21 @@ class ChatRequest(BaseModel):
             "Give me a coffee growth strategy for Main Street Coffee",
         ],
     )
+    format: Literal["markdown", "json"] = Field(
+        "markdown",
+        description="'markdown' renders `answer`; 'json' leaves it empty and only returns `data`",
+    )
+    stream: bool = Field(
+        False,
+        description="Stream small-talk replies as server-sent events; other intents still return JSON",
+    )
 
 
 class ChatResponse(BaseModel):
     """Agent answer."""
     intent: str = Field(..., description="Detected intent (combo|forecast|staffing|expansion|growth|unknown)")
     branch: Optional[str] = Field(None, description="Branch the answer relates to")
-    answer: str = Field(..., description="Human-readable Markdown answer")
+    answer: str = Field(..., description="Human-readable Markdown answer (empty when format='json')")
     confidence: float = Field(..., description="Intent-classification confidence 0-1")
     elapsed_ms: float = Field(..., description="End-to-end processing time in milliseconds")
     data: Optional[Any] = Field(None, description="Raw service result for programmatic consumers")
@@ -4,3 +4,25 @@ from pydantic import BaseModel, Field
 class StaffingRequest(BaseModel):
     branch: str = Field(..., min_length=1)
     shift: str = Field(default="evening", min_length=3)
+
+
+# ── Response models ────────────────────────────────────────────────────────
+
+class StaffingScenarios(BaseModel):
+    low: int
+    base: int
+    high: int
+
+
+class StaffingResponse(BaseModel):
+    branch: str
+    shift: str
+    recommended_staff: int
+    scenarios: StaffingScenarios
+    historical_days: int = Field(description="Days of attendance history for this branch/shift")
+    average_historical_staff: float
+    demand_factor: float = Field(description="Multiplier from the branch monthly-sales trend")
+    demand_trend: str = Field(description="growing | stable | declining | unknown")
+    confidence: str = Field(description="low | medium | high")
+    explanation: str
+    assumptions: list[str]
@@ -9,61 +9,185 @@ Combo recommendation engines:
 from __future__ import annotations
 
 import functools
-from collections import Counter
-from itertools import combinations
+from dataclasses import dataclass
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
 from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import normalize
+
+from app.core.config import on_data_change
 
 DATA_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "processed" / "basket_lines.csv"
 NON_PRODUCTS = {"DELIVERY CHARGE"}
 MODEL_NAME = "Item-Item Cosine Similarity"
 DISCOUNT_PCT = 0.12
 
-
+# Columns the engines read, with their dtypes declared up front so the
+# parser neither infers types nor materialises unused text columns.
+# Low-cardinality keys load as categories: integer codes make filters and
+# groupbys cheap.  Amounts stay float64: float32 cannot hold cents at these
+# magnitudes (893918.92 -> 893918.9375).
+BASKET_DTYPES = {
+    "basket_id": "category",
+    "Branch": "category",
+    "Item Description": "category",
+    "Price": "float64",
+    "Line Total": "float64",
+    "Is Cancellation": "int8",
+    "Is_Modifier": "int8",
+}
+
+# Bumped on every CSV read so prepared branch data never outlives its frame
+_DATA_LOADS = 0
+
+
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_basket_lines() -> pd.DataFrame:
     """Read basket_lines.csv and return a DataFrame."""
+    global _DATA_LOADS
     if not DATA_PATH.exists():
         raise FileNotFoundError(
             f"basket_lines.csv not found at {DATA_PATH}. "
             "Run  python pipelines/clean_00502_baskets.py  first."
         )
-    df = pd.read_csv(DATA_PATH)
-    df["Is Cancellation"] = df["Is Cancellation"].astype(int)
-    df["Is_Modifier"] = df["Is_Modifier"].astype(int)
-    return df
+    _DATA_LOADS += 1
+    return pd.read_csv(DATA_PATH, usecols=list(BASKET_DTYPES), dtype=BASKET_DTYPES)
+
+
+def _category_mask(col: pd.Series, category_hits: np.ndarray) -> np.ndarray:
+    """Broadcast a per-category boolean array onto the rows of *col*."""
+    # Missing values have code -1 and never match
+    return np.append(category_hits, False)[col.cat.codes.to_numpy()]
 
 
 def _filter_combo_rows(df: pd.DataFrame, branch: str, include_modifiers: bool) -> tuple[str, pd.DataFrame]:
-    """Apply common combo filters and optional branch slicing."""
-    filtered = df[df["Is Cancellation"] == 0].copy()
-    filtered = filtered[~filtered["Item Description"].astype(str).str.upper().isin(NON_PRODUCTS)]
+    """Apply common combo filters and optional branch slicing.
+
+    Cancellations, non-products, modifiers (optionally) and other branches
+    are combined into one row mask and sliced once; the result is only
+    read downstream, so no copy is taken.
+    """
+    names = df["Item Description"]
+    non_product = names.cat.categories.astype(str).str.upper().isin(NON_PRODUCTS)
+    mask = (df["Is Cancellation"].to_numpy() == 0) & ~_category_mask(names, non_product)
     if not include_modifiers:
-        filtered = filtered[filtered["Is_Modifier"] == 0]
+        mask &= df["Is_Modifier"].to_numpy() == 0
 
     branch_label = branch.strip()
     if branch_label.lower() != "all":
-        filtered = filtered[
-            filtered["Branch"].astype(str).str.strip().str.lower() == branch_label.lower()
-        ]
-    return branch_label, filtered
+        branches = df["Branch"]
+        matches = branches.cat.categories.astype(str).str.strip().str.lower() == branch_label.lower()
+        mask &= _category_mask(branches, matches)
+    return branch_label, df[mask]
+
+
+def _build_baskets_and_revenue(
+    df: pd.DataFrame,
+) -> tuple[sp.csr_matrix, sp.csr_matrix, np.ndarray, np.ndarray]:
+    """Basket x item incidence and revenue matrices for baskets with >= 2 items.
+
+    Returns ``(incidence, revenue, items, basket_ids)``.  Rows follow sorted
+    basket ids; item codes are assigned in sorted order, so ``code_a <
+    code_b`` matches the ``item_a < item_b`` convention of the pair keys.
+    """
+    # One groupby over (basket, item) instead of a nested groupby per basket
+    rev = df.groupby(["basket_id", "Item Description"], observed=True)["Line Total"].sum()
+    basket_codes, basket_ids = pd.factorize(np.asarray(rev.index.get_level_values(0), dtype=object), sort=True)
+    sizes = np.bincount(basket_codes, minlength=len(basket_ids))
+    multi = sizes >= 2
+    keep = multi[basket_codes]
+
+    rows = (np.cumsum(multi) - 1)[basket_codes[keep]]
+    cols, items = pd.factorize(np.asarray(rev.index.get_level_values(1), dtype=object)[keep], sort=True)
+    shape = (int(multi.sum()), len(items))
+    incidence = sp.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=shape)
+    revenue = sp.csr_matrix((rev.to_numpy()[keep], (rows, cols)), shape=shape)
+    return incidence, revenue, np.asarray(items, dtype=object), np.asarray(basket_ids, dtype=object)[multi]
+
+
+@dataclass(slots=True, frozen=True, eq=False)
+class _BranchData:
+    """Threshold-independent combo artifacts for one branch slice.
+
+    Shared between calls through ``_prepare_branch``; treat as read-only.
+    Hashed by identity, so derived caches (``_train_ml``) follow it.
+    """
+
+    n_rows: int
+    item_avg_price: dict[str, float]
+    basket_ids: np.ndarray
+    incidence: sp.csr_matrix | None = None
+    revenue: sp.csr_matrix | None = None
+    items: np.ndarray | None = None
+    item_counts: np.ndarray | None = None
+    pairs: sp.coo_matrix | None = None
+
+    @property
+    def total_baskets(self) -> int:
+        return len(self.basket_ids)
+
+
+def _pair_counts(incidence: sp.csr_matrix) -> sp.csr_matrix:
+    """Baskets holding each item pair: the upper triangle of B.T @ B.
+
+    Shared by both engines; ``[a, b]`` with ``a < b`` is the pair count.
+    """
+    counts = sp.triu(incidence.T @ incidence, k=1).tocsr()
+    counts.sort_indices()
+    return counts
+
+
+def _shared_baskets(incidence: sp.csr_matrix, a_idx: np.ndarray, b_idx: np.ndarray) -> sp.csc_matrix:
+    """Basket x pair matrix, nonzero where a basket holds both items of the pair.
+
+    Row indices are sorted, so each column lists its baskets in order.
+    """
+    both = incidence[:, a_idx].multiply(incidence[:, b_idx]).tocsc()
+    both.sort_indices()
+    return both
+
+
+def _prepare_rows(filtered: pd.DataFrame) -> _BranchData:
+    """Build incidence/revenue matrices and co-occurrence counts."""
+    if filtered.empty:
+        return _BranchData(0, {}, np.empty(0, dtype=object))
+    incidence, revenue, items, basket_ids = _build_baskets_and_revenue(filtered)
+    item_avg_price = _average_item_prices(filtered)
+    if not len(basket_ids):
+        return _BranchData(len(filtered), item_avg_price, basket_ids)
+
+    return _BranchData(
+        n_rows=len(filtered),
+        item_avg_price=item_avg_price,
+        basket_ids=basket_ids,
+        incidence=incidence,
+        revenue=revenue,
+        items=items,
+        item_counts=incidence.getnnz(axis=0),
+        pairs=_pair_counts(incidence).tocoo(),
+    )
+
+
+@on_data_change
+@functools.lru_cache(maxsize=64)
+def _prepare_branch(data_loads: int, branch_key: str, include_modifiers: bool) -> _BranchData:
+    """Cached ``_prepare_rows``; *data_loads* ties entries to one CSV read."""
+    _, filtered = _filter_combo_rows(_load_basket_lines(), branch_key, include_modifiers)
+    return _prepare_rows(filtered)
+
 
+def _branch_data(branch: str, include_modifiers: bool) -> _BranchData:
+    """Prepared data for *branch*, cached per (branch, include_modifiers).
 
-def _build_baskets_and_revenue(df: pd.DataFrame) -> tuple[dict[str, set[str]], dict[str, dict[str, float]]]:
-    """Build basket item sets and per-basket revenue lookups."""
-    baskets: dict[str, set[str]] = {}
-    basket_revenue: dict[str, dict[str, float]] = {}
-    for basket_id, group in df.groupby("basket_id"):
-        items = set(group["Item Description"].astype(str).unique())
-        if len(items) >= 2:
-            baskets[str(basket_id)] = items
-            rev = group.groupby("Item Description")["Line Total"].sum().to_dict()
-            basket_revenue[str(basket_id)] = {str(k): float(v) for k, v in rev.items()}
-    return baskets, basket_revenue
+    Thresholds and ``top_k`` only affect the final filter and sort, so the
+    engines and ``compare_combo_solutions`` all reuse the same slice.
+    """
+    _load_basket_lines()
+    return _prepare_branch(_DATA_LOADS, branch.strip().lower(), include_modifiers)
 
 
 def _average_item_prices(df: pd.DataFrame) -> dict[str, float]:
@@ -91,33 +215,41 @@ def _bundle_pricing(item_a: str, item_b: str, item_avg_price: dict[str, float])
     }
 
 
-def _average_combo_revenue(
-    item_a: str,
-    item_b: str,
-    baskets: dict[str, set[str]],
-    basket_revenue: dict[str, dict[str, float]],
-) -> float:
-    combo_revenues: list[float] = []
-    for bid, items in baskets.items():
-        if item_a in items and item_b in items:
-            rev_a = basket_revenue[bid].get(item_a, 0.0)
-            rev_b = basket_revenue[bid].get(item_b, 0.0)
-            combo_revenues.append(rev_a + rev_b)
-    return round(sum(combo_revenues) / len(combo_revenues), 2) if combo_revenues else 0.0
-
-
-def _pair_set_from_baskets(baskets: dict[str, set[str]], basket_ids: list[str]) -> set[tuple[str, str]]:
-    pairs: set[tuple[str, str]] = set()
-    for bid in basket_ids:
-        items = sorted(baskets.get(bid, set()))
-        for pair in combinations(items, 2):
-            pairs.add(pair)
-    return pairs
+def _round_array(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Vectorised ``round(x, ndigits)`` with exactly the built-in's results.
+
+    ``np.round`` scales by 10**ndigits first, and that product can land on
+    the wrong side of a .5 boundary; the few values that close to a tie are
+    rounded with ``round`` instead.
+    """
+    scale = 10.0 ** ndigits
+    scaled = np.asarray(values, dtype=float) * scale
+    out = np.rint(scaled) / scale
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        out[i] = round(float(values[i]), ndigits)
+    return out
+
+
+def _top_k_desc(values: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the *top_k* largest *values*, descending; ties keep index order.
+
+    Same result as a stable descending sort cut to *top_k*, but only the
+    values tied with or above the k-th largest get sorted.
+    """
+    n = len(values)
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k < n:
+        kth = np.partition(values, n - top_k)[n - top_k]
+        candidates = np.flatnonzero(values >= kth)
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-values[candidates], kind="stable")][:top_k]
 
 
 def _available_branches(df: pd.DataFrame) -> list[str]:
     """Return sorted unique branch names in the basket data."""
-    return sorted(df["Branch"].astype(str).str.strip().unique().tolist())
+    return sorted(set(df["Branch"].cat.categories.astype(str).str.strip()))
 
 
 def _empty_response(branch: str, include_modifiers: bool, available: list[str] | None = None) -> dict:
@@ -162,65 +294,129 @@ def recommend_combos(
 ) -> dict:
     """Return top-K non-AI combo recommendations for *branch* (or 'all')."""
 
-    df = _load_basket_lines()
-    branch_label, filtered = _filter_combo_rows(df, branch, include_modifiers)
-    available = _available_branches(df)
-    if filtered.empty:
-        return _empty_response(branch_label, include_modifiers, available)
+    available = _available_branches(_load_basket_lines())
+    return _combos_from_data(
+        _branch_data(branch, include_modifiers), branch.strip(), available,
+        top_k, include_modifiers, min_support, min_confidence, min_lift,
+    )
 
-    baskets, basket_revenue = _build_baskets_and_revenue(filtered)
-    item_avg_price = _average_item_prices(filtered)
-    total_baskets = len(baskets)
+
+def recommend_combos_batch(
+    branches: list[str],
+    top_k: int = 5,
+    include_modifiers: bool = False,
+    min_support: float = 0.02,
+    min_confidence: float = 0.15,
+    min_lift: float = 1.0,
+) -> dict[str, dict | Exception]:
+    """``recommend_combos`` for several branches from one data load.
+
+    Each branch's baskets and co-occurrence counts come from the shared
+    ``_branch_data`` cache.  Per-branch failures are returned in place as
+    the exception instance.
+    """
+    available = _available_branches(_load_basket_lines())
+    results: dict[str, dict | Exception] = {}
+    for branch in branches:
+        try:
+            results[branch] = _combos_from_data(
+                _branch_data(branch, include_modifiers), branch.strip(), available,
+                top_k, include_modifiers, min_support, min_confidence, min_lift,
+            )
+        except Exception as exc:
+            results[branch] = exc
+    return results
+
+
+def _combos_from_data(
+    data: _BranchData,
+    branch_label: str,
+    available: list[str],
+    top_k: int,
+    include_modifiers: bool,
+    min_support: float,
+    min_confidence: float,
+    min_lift: float,
+) -> dict:
+    """Support/confidence/lift ranking over a prepared branch slice."""
+    total_baskets = data.total_baskets
     if total_baskets == 0:
         return _empty_response(branch_label, include_modifiers, available)
 
-    item_counts: Counter[str] = Counter()
-    pair_counts: Counter[tuple[str, str]] = Counter()
-    for items in baskets.values():
-        for item in items:
-            item_counts[item] += 1
-        for pair in combinations(sorted(items), 2):
-            pair_counts[pair] += 1
-
-    results: list[dict] = []
-    for (item_a, item_b), count_ab in pair_counts.items():
-        support = count_ab / total_baskets
-        if support < min_support:
-            continue
-
-        support_a = item_counts[item_a] / total_baskets
-        support_b = item_counts[item_b] / total_baskets
-        confidence_a_to_b = count_ab / item_counts[item_a]
-        confidence_b_to_a = count_ab / item_counts[item_b]
-        lift = support / (support_a * support_b) if (support_a * support_b) > 0 else 0.0
-
-        if confidence_a_to_b < min_confidence and confidence_b_to_a < min_confidence:
-            continue
-        if lift < min_lift:
-            continue
+    items, item_count_arr = data.items, data.item_counts
+    a_idx, b_idx, counts = data.pairs.row, data.pairs.col, data.pairs.data
 
-        pricing = _bundle_pricing(item_a, item_b, item_avg_price)
-        results.append(
-            {
-                "item_a": item_a,
-                "item_b": item_b,
-                "support": round(support, 4),
-                "confidence_a_to_b": round(confidence_a_to_b, 4),
-                "confidence_b_to_a": round(confidence_b_to_a, 4),
-                "lift": round(lift, 4),
-                "basket_count": count_ab,
-                "avg_combo_revenue": _average_combo_revenue(item_a, item_b, baskets, basket_revenue),
-                **pricing,
-            }
-        )
+    support = counts / total_baskets
+    support_a = item_count_arr[a_idx] / total_baskets
+    support_b = item_count_arr[b_idx] / total_baskets
+    confidence_a_to_b = counts / item_count_arr[a_idx]
+    confidence_b_to_a = counts / item_count_arr[b_idx]
+    lift = support / (support_a * support_b)
 
-    results.sort(key=lambda r: r["lift"], reverse=True)
-    top_results = results[:top_k]
+    keep = (
+        (support >= min_support)
+        & ((confidence_a_to_b >= min_confidence) | (confidence_b_to_a >= min_confidence))
+        & (lift >= min_lift)
+    )
+    a_idx, b_idx, counts = a_idx[keep], b_idx[keep], counts[keep]
+    support, lift = support[keep], lift[keep]
+    confidence_a_to_b, confidence_b_to_a = confidence_a_to_b[keep], confidence_b_to_a[keep]
+
+    # Rank by rounded lift; equal lifts keep the order in which the pairs
+    # first occur (basket order, then item order within the basket).  Only
+    # the pairs that can reach the top K need their first shared basket.
+    rounded_lift = _round_array(lift, 4)
+    n_passing = len(rounded_lift)
+    cand = _top_k_desc(rounded_lift, top_k)
+    if len(cand):
+        cand = np.flatnonzero(rounded_lift >= rounded_lift[cand[-1]])
+    shared = _shared_baskets(data.incidence, a_idx[cand], b_idx[cand])
+    first_basket = shared.indices[shared.indptr[:-1]]
+    picked = np.lexsort((b_idx[cand], a_idx[cand], first_basket, -rounded_lift[cand]))[:top_k]
+    top = cand[picked]
+
+    # Per-basket revenue of each top pair, read off the revenue columns at
+    # its shared baskets (already found above); summed in basket order so
+    # the averages round as they always have.
+    top_a, top_b = a_idx[top], b_idx[top]
+    both = shared[:, picked]
+    pair_revenue = (data.revenue[:, top_a].multiply(both) + data.revenue[:, top_b].multiply(both)).tocsc()
+    pair_revenue.sort_indices()
+    avg_revenue = np.array(
+        [sum(pair_revenue.data[pair_revenue.indptr[n]:pair_revenue.indptr[n + 1]].tolist())
+         for n in range(len(top))], dtype=float
+    ) / counts[top]
+
+    # Round each metric once over the top-K rows, then build the dicts
+    columns = zip(
+        items[top_a].tolist(),
+        items[top_b].tolist(),
+        _round_array(support[top], 4).tolist(),
+        _round_array(confidence_a_to_b[top], 4).tolist(),
+        _round_array(confidence_b_to_a[top], 4).tolist(),
+        rounded_lift[top].tolist(),
+        counts[top].tolist(),
+        _round_array(avg_revenue, 2).tolist(),
+    )
+    top_results: list[dict] = [
+        {
+            "item_a": item_a,
+            "item_b": item_b,
+            "support": sup,
+            "confidence_a_to_b": conf_ab,
+            "confidence_b_to_a": conf_ba,
+            "lift": lift_ab,
+            "basket_count": count_ab,
+            "avg_combo_revenue": revenue_ab,
+            **_bundle_pricing(item_a, item_b, data.item_avg_price),
+        }
+        for item_a, item_b, sup, conf_ab, conf_ba, lift_ab, count_ab, revenue_ab in columns
+    ]
 
     explanation = (
         f"Analysed {total_baskets} delivery baskets"
         f"{' for branch ' + branch_label if branch_label.lower() != 'all' else ' across all branches'}. "
-        f"Found {len(results)} item pairs passing thresholds "
+        f"Found {n_passing} item pairs passing thresholds "
         f"(support>={min_support}, confidence>={min_confidence}, lift>={min_lift}). "
         f"Returning top {len(top_results)} by lift. "
         f"Modifiers {'included' if include_modifiers else 'excluded'}."
@@ -241,112 +437,149 @@ def recommend_combos_ml(
     min_support: float = 0.02,
 ) -> dict:
     """Return top-K ML combo recommendations using item-item cosine similarity."""
-    df = _load_basket_lines()
-    branch_label, filtered = _filter_combo_rows(df, branch, include_modifiers)
-    if filtered.empty:
-        return _empty_ml_response(
-            branch_label,
-            include_modifiers,
-            f"No data after filtering for branch '{branch_label}'.",
-        )
+    return _ml_combos_from_data(
+        _branch_data(branch, include_modifiers), branch.strip(), top_k, include_modifiers, min_support
+    )
 
-    baskets, _ = _build_baskets_and_revenue(filtered)
-    item_avg_price = _average_item_prices(filtered)
-    basket_ids = sorted(baskets.keys())
-    total_baskets = len(basket_ids)
-    if total_baskets < 2:
-        return _empty_ml_response(
-            branch_label,
-            include_modifiers,
-            "Not enough baskets for train/test split. Need at least 2 baskets.",
-        )
 
+@dataclass(slots=True, frozen=True)
+class _MLModel:
+    """Cosine-similarity model trained on a branch slice's fixed 80/20 split.
+
+    ``note`` explains why no model could be trained; the arrays are then
+    unset.  Pairs are in (item_a, item_b) order; ``a_idx``/``b_idx`` index
+    ``train_items`` and ``train_cols`` maps them back to item codes.
+    """
+
+    note: str | None
+    train_items: list[str] | None = None
+    train_cols: np.ndarray | None = None
+    a_idx: np.ndarray | None = None
+    b_idx: np.ndarray | None = None
+    sims: np.ndarray | None = None
+    counts: np.ndarray | None = None
+    train_basket_count: int = 0
+    test_pairs: sp.csr_matrix | None = None
+
+
+@on_data_change
+@functools.lru_cache(maxsize=64)
+def _train_ml(data: _BranchData) -> _MLModel:
+    """Train the similarity model once per prepared slice.
+
+    The split is deterministic, so nothing here depends on the request
+    thresholds; callers only filter and rank the cached pairs.
+    """
+    total_baskets = data.total_baskets
+    # Split row positions rather than ids: same shuffle, and the rows index
+    # straight into the prepared incidence matrix.
     try:
-        train_ids, test_ids = train_test_split(
-            basket_ids,
+        train_rows, test_rows = train_test_split(
+            np.arange(total_baskets),
             test_size=0.2,
             random_state=42,
             shuffle=True,
         )
     except ValueError:
-        return _empty_ml_response(
-            branch_label,
-            include_modifiers,
-            "Unable to split baskets into train/test partitions.",
-        )
+        return _MLModel("Unable to split baskets into train/test partitions.")
 
-    if not train_ids or not test_ids:
-        return _empty_ml_response(
-            branch_label,
-            include_modifiers,
-            "Train/test split produced an empty partition.",
-        )
+    if not len(train_rows) or not len(test_rows):
+        return _MLModel("Train/test split produced an empty partition.")
 
-    train_items = sorted({item for bid in train_ids for item in baskets.get(str(bid), set())})
+    # Columns restricted to items seen in training (codes are in name order)
+    train_matrix = data.incidence[train_rows]
+    train_cols = np.flatnonzero(train_matrix.getnnz(axis=0))
+    train_items = data.items[train_cols].tolist()
     if len(train_items) < 2:
+        return _MLModel("Not enough unique items in training split for cosine-similarity model.")
+
+    train_matrix = train_matrix[:, train_cols]
+    if train_matrix.nnz == 0:
+        return _MLModel("Training matrix is empty after filtering.")
+
+    # Item-item cosine similarity as a sparse product of L2-normalised item
+    # columns; only co-occurring pairs are stored.  The upper triangle
+    # (i < j, i.e. item_a < item_b) comes out row-major, in pair order.
+    normalized = normalize(train_matrix.astype(float), norm="l2", axis=0)
+    similarity = sp.triu(normalized.T @ normalized, k=1).tocsr()
+    similarity.sort_indices()
+    similarity = similarity.tocoo()
+    positive = similarity.data > 0
+    a_idx, b_idx, sims = similarity.row[positive], similarity.col[positive], similarity.data[positive]
+    counts = np.asarray(_pair_counts(train_matrix)[a_idx, b_idx]).ravel()
+
+    return _MLModel(
+        note=None,
+        train_items=train_items,
+        train_cols=train_cols,
+        a_idx=a_idx,
+        b_idx=b_idx,
+        sims=sims,
+        counts=counts,
+        train_basket_count=len(train_rows),
+        test_pairs=_pair_counts(data.incidence[test_rows]),
+    )
+
+
+def _ml_combos_from_data(
+    data: _BranchData,
+    branch_label: str,
+    top_k: int,
+    include_modifiers: bool,
+    min_support: float,
+) -> dict:
+    """Cosine-similarity ranking over a prepared branch slice."""
+    if data.n_rows == 0:
         return _empty_ml_response(
             branch_label,
             include_modifiers,
-            "Not enough unique items in training split for cosine-similarity model.",
+            f"No data after filtering for branch '{branch_label}'.",
         )
 
-    item_to_idx = {item: idx for idx, item in enumerate(train_items)}
-    basket_matrix = np.zeros((len(train_ids), len(train_items)), dtype=float)
-    for row_idx, bid in enumerate(train_ids):
-        for item in baskets.get(str(bid), set()):
-            col_idx = item_to_idx.get(item)
-            if col_idx is not None:
-                basket_matrix[row_idx, col_idx] = 1.0
-
-    if float(basket_matrix.sum()) == 0:
+    item_avg_price = data.item_avg_price
+    total_baskets = data.total_baskets
+    if total_baskets < 2:
         return _empty_ml_response(
             branch_label,
             include_modifiers,
-            "Training matrix is empty after filtering.",
+            "Not enough baskets for train/test split. Need at least 2 baskets.",
         )
 
-    similarity = cosine_similarity(basket_matrix.T)
-    np.fill_diagonal(similarity, 0.0)
-
-    train_pair_counts = Counter()
-    for bid in train_ids:
-        for pair in combinations(sorted(baskets.get(str(bid), set())), 2):
-            train_pair_counts[pair] += 1
-
-    ml_pairs: list[dict] = []
-    train_basket_count = len(train_ids)
-    for i in range(len(train_items)):
-        for j in range(i + 1, len(train_items)):
-            sim_score = float(similarity[i, j])
-            if sim_score <= 0:
-                continue
-
-            item_a = train_items[i]
-            item_b = train_items[j]
-            count_ab = train_pair_counts.get((item_a, item_b), 0)
-            support_train = (count_ab / train_basket_count) if train_basket_count else 0.0
-            if support_train < min_support:
-                continue
-
-            pricing = _bundle_pricing(item_a, item_b, item_avg_price)
-            ml_pairs.append(
-                {
-                    "item_a": item_a,
-                    "item_b": item_b,
-                    "similarity_score": round(sim_score, 4),
-                    "support_train": round(support_train, 4),
-                    "basket_count_train": int(count_ab),
-                    **pricing,
-                }
-            )
-
-    ml_pairs.sort(
-        key=lambda r: (-r["similarity_score"], -r["support_train"], r["item_a"], r["item_b"])
-    )
-    top_results = ml_pairs[:top_k]
+    model = _train_ml(data)
+    if model.note is not None:
+        return _empty_ml_response(branch_label, include_modifiers, model.note)
+    train_items, train_cols = model.train_items, model.train_cols
+    a_idx, b_idx, sims, counts = model.a_idx, model.b_idx, model.sims, model.counts
+
+    support_train = counts / model.train_basket_count
+    keep = support_train >= min_support
+    a_idx, b_idx, sims = a_idx[keep], b_idx[keep], sims[keep]
+    counts, support_train = counts[keep], support_train[keep]
+    n_candidates = len(sims)
+
+    # Rank by rounded similarity, then rounded support; pairs are already in
+    # (item_a, item_b) order, which the stable sort keeps for full ties.
+    rounded_sim = _round_array(sims, 4)
+    rounded_support = _round_array(support_train, 4)
+    top = np.lexsort((-rounded_support, -rounded_sim))[:max(top_k, 0)]
+
+    top_results: list[dict] = []
+    for i in top.tolist():
+        item_a, item_b = train_items[a_idx[i]], train_items[b_idx[i]]
+        pricing = _bundle_pricing(item_a, item_b, item_avg_price)
+        top_results.append(
+            {
+                "item_a": item_a,
+                "item_b": item_b,
+                "similarity_score": float(rounded_sim[i]),
+                "support_train": float(rounded_support[i]),
+                "basket_count_train": int(counts[i]),
+                **pricing,
+            }
+        )
 
-    test_pairs = _pair_set_from_baskets(baskets, [str(bid) for bid in test_ids])
-    if not test_pairs:
+    test_pairs = model.test_pairs
+    if not test_pairs.nnz:
         precision_at_k = None
         evaluation_note = (
             f"Precision@{top_k} unavailable because no 2-item pairs were present in held-out test baskets."
@@ -355,19 +588,19 @@ def recommend_combos_ml(
         precision_at_k = None
         evaluation_note = f"Precision@{top_k} unavailable because ML model produced no candidate pairs."
     else:
-        predicted_pairs = {(r["item_a"], r["item_b"]) for r in top_results}
-        hits = sum(1 for pair in predicted_pairs if pair in test_pairs)
+        top_a, top_b = train_cols[a_idx[top]], train_cols[b_idx[top]]
+        hits = int(np.count_nonzero(np.asarray(test_pairs[top_a, top_b]).ravel()))
         precision_at_k = round(hits / top_k, 4)
         evaluation_note = (
             f"Precision@{top_k} on held-out baskets: {precision_at_k} "
-            f"({hits}/{top_k} hits; {len(test_pairs)} true test pairs)."
+            f"({hits}/{top_k} hits; {test_pairs.nnz} true test pairs)."
         )
 
     explanation = (
         f"ML model={MODEL_NAME}. "
         f"Train/test split is deterministic (80/20, random_state=42). "
         f"Filtered by support>={min_support}. "
-        f"Generated {len(ml_pairs)} pair candidates, returning top {len(top_results)}."
+        f"Generated {n_candidates} pair candidates, returning top {len(top_results)}."
     )
     return {
         "branch": branch_label,
@@ -410,20 +643,14 @@ def compare_combo_solutions(
     min_lift: float = 1.0,
 ) -> dict:
     """Compare non-AI and ML combo engines side-by-side."""
-    non_ai = recommend_combos(
-        branch=branch,
-        top_k=top_k,
-        include_modifiers=include_modifiers,
-        min_support=min_support,
-        min_confidence=min_confidence,
-        min_lift=min_lift,
-    )
-    ml = recommend_combos_ml(
-        branch=branch,
-        top_k=top_k,
-        include_modifiers=include_modifiers,
-        min_support=min_support,
+    # Both engines rank the same prepared slice
+    data = _branch_data(branch, include_modifiers)
+    branch_label = branch.strip()
+    non_ai = _combos_from_data(
+        data, branch_label, _available_branches(_load_basket_lines()),
+        top_k, include_modifiers, min_support, min_confidence, min_lift,
     )
+    ml = _ml_combos_from_data(data, branch_label, top_k, include_modifiers, min_support)
 
     non_ai_answer_line = f"The non AI answer: {_summarize_non_ai(non_ai['recommendations'])}"
     ml_answer_line = f"The ML [{MODEL_NAME}] answer: {_summarize_ml(ml['recommendations'])}"
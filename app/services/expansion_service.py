@@ -34,10 +34,14 @@ Data sources (internal):
 from __future__ import annotations
 
 import functools
+from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from app.core.config import on_data_change
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -52,6 +56,12 @@ _ITEM_SALES = _PROC / "Sales by items and groups.csv"
 _DIV_CHANNEL = _PROC / "Summary by division-menu channel.csv"
 _AREAS = _EXT / "lebanon_candidate_areas.csv"
 
+# Columns the scorers read.  The wider exports are trimmed at parse time so
+# customer names/addresses, report metadata and barcodes are never built.
+_CUST_ORDERS_COLS = ["branch", "num_orders"]
+_ITEM_SALES_COLS = ["branch", "division", "description", "total_amount"]
+_DIV_CHANNEL_COLS = ["section", "item", "total"]
+
 # Month ordering for chronological sort
 _MONTH_ORDER = {
     "January": 1, "February": 2, "March": 3, "April": 4,
@@ -80,6 +90,7 @@ DEFAULT_WEIGHTS: dict[str, float] = {
 # Data loaders (cached)
 # ---------------------------------------------------------------------------
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_monthly_sales() -> pd.DataFrame:
     df = pd.read_csv(_MONTHLY_SALES)
@@ -88,24 +99,48 @@ def _load_monthly_sales() -> pd.DataFrame:
     return df
 
 
+@on_data_change
+@functools.lru_cache(maxsize=1)
+def _monthly_totals_by_branch() -> dict[str, np.ndarray]:
+    """Chronological monthly totals per branch.
+
+    The loader already sorts by branch, year and month, so each branch is
+    one contiguous run of rows and is sliced out without filtering.
+    """
+    ms = _load_monthly_sales()
+    if ms.empty:
+        return {}
+    branch = ms["branch"].to_numpy()
+    totals = ms["total"].to_numpy(dtype=float)
+    bounds = np.r_[0, np.flatnonzero(branch[1:] != branch[:-1]) + 1, len(ms)]
+    return {
+        branch[start]: totals[start:end]
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist())
+    }
+
+
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_avg_channel() -> pd.DataFrame:
     return pd.read_csv(_AVG_CHANNEL)
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_cust_orders() -> pd.DataFrame:
-    return pd.read_csv(_CUST_ORDERS)
+    return pd.read_csv(_CUST_ORDERS, usecols=_CUST_ORDERS_COLS)
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_item_sales() -> pd.DataFrame:
-    return pd.read_csv(_ITEM_SALES)
+    return pd.read_csv(_ITEM_SALES, usecols=_ITEM_SALES_COLS)
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_div_channel() -> pd.DataFrame:
-    return pd.read_csv(_DIV_CHANNEL)
+    return pd.read_csv(_DIV_CHANNEL, usecols=_DIV_CHANNEL_COLS)
 
 
 @functools.lru_cache(maxsize=1)
@@ -118,54 +153,154 @@ def _load_candidate_areas() -> pd.DataFrame:
     return pd.read_csv(_AREAS)
 
 
+# ---------------------------------------------------------------------------
+# Per-branch KPI inputs (cached)
+# ---------------------------------------------------------------------------
+
+def _by_branch(df: pd.DataFrame, key: str = "branch") -> dict[str, pd.DataFrame]:
+    """Split *df* into per-branch frames in one groupby pass (row order kept)."""
+    return dict(list(df.groupby(key, sort=False)))
+
+
+@dataclass(slots=True, frozen=True, eq=False)
+class _BranchInputs:
+    """Everything the scorers read about one branch, reduced from the frames.
+
+    A source with no rows for the branch leaves its fields None (the
+    scorer then applies its neutral score).
+    """
+    total_revenue: float
+    monthly_totals: np.ndarray | None
+    avg_ticket: float | None          # mean avg-per-customer over channels
+    channels: tuple[str, ...]
+    channel_sales: tuple[float, ...]
+    num_orders: np.ndarray | None     # one entry per delivery customer
+    unique_skus: int
+    divisions: int
+    division_revenue: pd.Series | None
+    items_revenue: float | None
+    beverage_revenue: float
+
+
+@dataclass(slots=True, frozen=True, eq=False)
+class _ScoringInputs:
+    """Per-branch inputs plus the all-branch normalizers."""
+    branches: dict[str, _BranchInputs]   # in sorted branch order
+    max_total: float
+    max_avg: float
+    max_skus: int
+
+
+@on_data_change
+@functools.lru_cache(maxsize=1)
+def _scoring_inputs() -> _ScoringInputs:
+    """Reduce the five source frames to per-branch KPI inputs, once.
+
+    None of this depends on the request, so evaluate_expansion only does
+    the scalar scoring arithmetic on each call.
+    """
+    ms = _load_monthly_sales()
+    ch = _load_avg_channel()
+    co = _load_cust_orders()
+    items = _load_item_sales()
+    dc = _load_div_channel()
+
+    all_totals: dict[str, float] = (
+        ms.groupby("branch")["total"].sum().to_dict()
+    )
+    all_avg = ch.groupby("branch")["avg_per_customer"].mean()
+    all_skus = items.groupby("branch")["description"].nunique()
+
+    monthly_totals = _monthly_totals_by_branch()
+    ch_groups = _by_branch(ch)
+    co_groups = _by_branch(co)
+    item_groups = _by_branch(items)
+    dc_groups = _by_branch(dc, "section")
+
+    branches: dict[str, _BranchInputs] = {}
+    for b in sorted(ms["branch"].unique().tolist()):
+        bch = ch_groups.get(b)
+        bco = co_groups.get(b)
+        bi = item_groups.get(b)
+        bdc = dc_groups.get(b)
+        if bdc is not None:
+            items_row = bdc[bdc["item"] == "ITEMS"]
+            bev_rows = bdc[bdc["item"].isin(_BEVERAGE_DIVISIONS)]
+            items_total = float(items_row["total"].sum()) if not items_row.empty else 0.0
+            bev_total = float(bev_rows["total"].sum()) if not bev_rows.empty else 0.0
+        else:
+            items_total, bev_total = None, 0.0
+        branches[b] = _BranchInputs(
+            total_revenue=all_totals.get(b, 0.0),
+            monthly_totals=monthly_totals.get(b),
+            avg_ticket=bch["avg_per_customer"].mean() if bch is not None else None,
+            channels=tuple(bch["channel"].tolist()) if bch is not None else (),
+            channel_sales=tuple(bch["sales"].tolist()) if bch is not None else (),
+            num_orders=bco["num_orders"].to_numpy() if bco is not None else None,
+            unique_skus=bi["description"].nunique() if bi is not None else 0,
+            divisions=bi["division"].nunique() if bi is not None else 0,
+            division_revenue=(
+                bi.groupby("division")["total_amount"].sum() if bi is not None else None
+            ),
+            items_revenue=items_total,
+            beverage_revenue=bev_total,
+        )
+
+    return _ScoringInputs(
+        branches=branches,
+        max_total=max(all_totals.values()) if all_totals else 1.0,
+        max_avg=all_avg.max() if len(all_avg) else 1.0,
+        max_skus=all_skus.max() if len(all_skus) else 1,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Per-branch KPI calculators
 # ---------------------------------------------------------------------------
 
-def _demand_trend_score(branch: str, ms: pd.DataFrame) -> tuple[float, dict]:
-    """Score 0-100 based on MoM growth trend.  Positive → higher score."""
-    bdf = ms[ms["branch"] == branch].sort_values(["year", "month_num"])
-    totals = bdf["total"].tolist()
-    if len(totals) < 2:
+def _demand_trend_score(totals: np.ndarray | None) -> tuple[float, dict]:
+    """Score 0-100 based on MoM growth trend.  Positive → higher score.
+
+    *totals* is the branch's monthly revenue in chronological order.
+    """
+    if totals is None or len(totals) < 2:
         return 50.0, {"mom_growth_rates": [], "avg_mom_growth_pct": 0.0}
 
-    growths: list[float] = []
-    for i in range(1, len(totals)):
-        if totals[i - 1] > 0:
-            growths.append((totals[i] - totals[i - 1]) / totals[i - 1] * 100)
-    avg_growth = sum(growths) / len(growths) if growths else 0.0
+    prev = totals[:-1]
+    mask = prev > 0
+    growths = (totals[1:][mask] - prev[mask]) / prev[mask] * 100
+    avg_growth = float(growths.mean()) if growths.size else 0.0
 
     # Map avg MoM growth % → 0-100 score
     # -50% or worse → 0,  0% → 50,  +100% or better → 100
     raw = 50 + avg_growth * 0.5
     score = max(0.0, min(100.0, raw))
     return round(score, 2), {
-        "mom_growth_rates": [round(g, 2) for g in growths],
+        "mom_growth_rates": [round(g, 2) for g in growths.tolist()],
         "avg_mom_growth_pct": round(avg_growth, 2),
     }
 
 
-def _branch_strength_score(branch: str, ms: pd.DataFrame,
-                           all_totals: dict[str, float]) -> tuple[float, dict]:
+def _branch_strength_score(total: float,
+                           max_total: float) -> tuple[float, dict]:
     """Score 0-100 based on total revenue rank among peers."""
-    total = all_totals.get(branch, 0.0)
-    max_total = max(all_totals.values()) if all_totals else 1.0
     score = (total / max_total) * 100 if max_total > 0 else 0.0
     return round(score, 2), {"total_revenue": round(total, 2)}
 
 
-def _avg_ticket_score(branch: str, ch: pd.DataFrame) -> tuple[float, dict]:
-    """Score 0-100 combining avg-per-customer and channel diversity."""
-    bch = ch[ch["branch"] == branch]
-    if bch.empty:
+def _avg_ticket_score(inputs: _BranchInputs,
+                      max_avg: float) -> tuple[float, dict]:
+    """Score 0-100 combining avg-per-customer and channel diversity.
+
+    *max_avg* is the highest branch mean avg-per-customer (the normalizer).
+    """
+    avg_ticket = inputs.avg_ticket
+    if avg_ticket is None:
         return 50.0, {"avg_ticket": 0.0, "channels": 0}
 
-    avg_ticket = bch["avg_per_customer"].mean()
-    n_channels = len(bch)
+    n_channels = len(inputs.channels)
 
     # Normalize ticket: use max across all branches
-    all_avg = ch.groupby("branch")["avg_per_customer"].mean()
-    max_avg = all_avg.max() if len(all_avg) else 1.0
     ticket_norm = (avg_ticket / max_avg) * 100 if max_avg > 0 else 0.0
 
     # Channel diversity bonus: 1 channel → 0, 2 → 20, 3 → 40
@@ -177,14 +312,16 @@ def _avg_ticket_score(branch: str, ch: pd.DataFrame) -> tuple[float, dict]:
     return round(score, 2), {
         "avg_ticket": round(avg_ticket, 2),
         "channels": n_channels,
-        "channel_list": bch["channel"].tolist(),
+        "channel_list": list(inputs.channels),
     }
 
 
-def _repeat_customer_score(branch: str, co: pd.DataFrame) -> tuple[float, dict]:
-    """Score 0-100 based on % of delivery customers who ordered more than once."""
-    bco = co[co["branch"] == branch]
-    if bco.empty:
+def _repeat_customer_score(num_orders: np.ndarray | None) -> tuple[float, dict]:
+    """Score 0-100 based on % of delivery customers who ordered more than once.
+
+    *num_orders* holds one order count per delivery customer of the branch.
+    """
+    if num_orders is None:
         # No delivery data → neutral score
         return 50.0, {
             "total_customers": 0,
@@ -193,8 +330,8 @@ def _repeat_customer_score(branch: str, co: pd.DataFrame) -> tuple[float, dict]:
             "note": "No delivery customer data available; neutral score applied.",
         }
 
-    total_cust = len(bco)
-    repeat_cust = int((bco["num_orders"] > 1).sum())
+    total_cust = len(num_orders)
+    repeat_cust = int((num_orders > 1).sum())
     repeat_pct = (repeat_cust / total_cust) * 100 if total_cust > 0 else 0.0
 
     # Map repeat_pct to 0-100.  0% → 20, 30%+ → 100
@@ -207,17 +344,20 @@ def _repeat_customer_score(branch: str, co: pd.DataFrame) -> tuple[float, dict]:
     }
 
 
-def _product_mix_score(branch: str, items: pd.DataFrame) -> tuple[float, dict]:
-    """Score 0-100 using unique SKU count + revenue concentration (Herfindahl)."""
-    bi = items[items["branch"] == branch]
-    if bi.empty:
+def _product_mix_score(inputs: _BranchInputs,
+                       max_skus: int) -> tuple[float, dict]:
+    """Score 0-100 using unique SKU count + revenue concentration (Herfindahl).
+
+    *max_skus* is the highest unique-SKU count of any branch (the normalizer).
+    """
+    div_rev = inputs.division_revenue
+    if div_rev is None:
         return 50.0, {"unique_skus": 0, "divisions": 0, "herfindahl": 1.0}
 
-    n_skus = bi["description"].nunique()
-    n_divs = bi["division"].nunique()
+    n_skus = inputs.unique_skus
+    n_divs = inputs.divisions
 
     # Revenue Herfindahl index by division (lower = more diversified = better)
-    div_rev = bi.groupby("division")["total_amount"].sum()
     total_rev = div_rev.sum()
     if total_rev > 0:
         shares = div_rev / total_rev
@@ -226,8 +366,6 @@ def _product_mix_score(branch: str, items: pd.DataFrame) -> tuple[float, dict]:
         hhi = 1.0
 
     # Normalize: max SKUs across all branches → 100
-    all_skus = items.groupby("branch")["description"].nunique()
-    max_skus = all_skus.max() if len(all_skus) else 1
     sku_norm = (n_skus / max_skus) * 100 if max_skus > 0 else 0.0
 
     # Herfindahl: 0 → perfectly diversified, 1 → single division
@@ -244,18 +382,13 @@ def _product_mix_score(branch: str, items: pd.DataFrame) -> tuple[float, dict]:
     }
 
 
-def _beverage_attachment_score(branch: str,
-                               dc: pd.DataFrame) -> tuple[float, dict]:
+def _beverage_attachment_score(inputs: _BranchInputs) -> tuple[float, dict]:
     """Score 0-100 based on beverage revenue as % of total product (ITEMS) revenue."""
-    bdc = dc[dc["section"] == branch]
-    if bdc.empty:
+    items_total = inputs.items_revenue
+    if items_total is None:
         return 50.0, {"beverage_revenue": 0.0, "items_revenue": 0.0, "bev_pct": 0.0}
 
-    items_row = bdc[bdc["item"] == "ITEMS"]
-    bev_rows = bdc[bdc["item"].isin(_BEVERAGE_DIVISIONS)]
-
-    items_total = float(items_row["total"].sum()) if not items_row.empty else 0.0
-    bev_total = float(bev_rows["total"].sum()) if not bev_rows.empty else 0.0
+    bev_total = inputs.beverage_revenue
     bev_pct = (bev_total / items_total * 100) if items_total > 0 else 0.0
 
     # Map bev_pct to score.  0% → 0, 20%+ → 100
@@ -279,62 +412,74 @@ def _score_candidate_locations(
     """Score candidate areas based on attractiveness × archetype fit."""
 
     density_map = {"low": 1, "medium": 2, "high": 3}
-    scored: list[dict] = []
 
-    for _, row in areas.iterrows():
-        if row["conut_present"] == 1:
-            continue  # skip areas where Conut already exists
-
-        # Area attractiveness (0-100 scale)
-        pop_score = min(row["estimated_population"] / 5000, 100)   # 500k → 100
-        uni_bonus = 15 if row["university_nearby"] == 1 else 0
-        foot = row["foot_traffic_tier"] * 20        # 1-5 → 20-100
-        rent_penalty = row["commercial_rent_tier"] * 5  # 1-5 → 5-25
-        cafe_density = density_map.get(row["estimated_cafe_density"], 1)
-        # Medium café density is ideal (market exists but not saturated)
-        cafe_score = {1: 30, 2: 50, 3: 35}.get(cafe_density, 30)
-
-        attractiveness = (
-            pop_score * 0.30
-            + uni_bonus
-            + foot * 0.25
-            + cafe_score * 0.20
-            - rent_penalty * 0.10
-        )
-        attractiveness = max(0, min(100, attractiveness))
+    # Skip areas where Conut already exists
+    keep = areas["conut_present"].to_numpy() != 1
+    cols = {c: areas[c].to_numpy()[keep] for c in areas.columns}
+    pop = cols["estimated_population"]
+    uni = cols["university_nearby"] == 1
+    foot_tier = cols["foot_traffic_tier"]
+    rent_tier = cols["commercial_rent_tier"]
+    density_labels = cols["estimated_cafe_density"].tolist()
+    cafe_density = np.array([density_map.get(d, 1) for d in density_labels])
+
+    # Area attractiveness (0-100 scale)
+    pop_score = np.minimum(pop / 5000, 100)   # 500k → 100
+    uni_bonus = np.where(uni, 15, 0)
+    foot = foot_tier * 20        # 1-5 → 20-100
+    rent_penalty = rent_tier * 5  # 1-5 → 5-25
+    # Medium café density is ideal (market exists but not saturated)
+    cafe_score = np.select([cafe_density == 2, cafe_density == 3], [50, 35], 30)
+
+    attractiveness = np.clip(
+        pop_score * 0.30
+        + uni_bonus
+        + foot * 0.25
+        + cafe_score * 0.20
+        - rent_penalty * 0.10,
+        0, 100,
+    )
 
+    scored: list[dict] = []
+    rows = zip(
+        cols["area"].tolist(), cols["governorate"].tolist(), pop.tolist(),
+        uni.tolist(), foot_tier.tolist(), rent_tier.tolist(),
+        density_labels, cafe_density.tolist(), attractiveness.tolist(),
+    )
+    for (area, governorate, population, university, foot_t, rent_t,
+         density_label, density, score) in rows:
         # Build rationale
         pros: list[str] = []
         cons: list[str] = []
-        if row["estimated_population"] >= 100000:
-            pros.append(f"Large population ({row['estimated_population']:,})")
-        elif row["estimated_population"] >= 50000:
-            pros.append(f"Mid-size population ({row['estimated_population']:,})")
+        if population >= 100000:
+            pros.append(f"Large population ({population:,})")
+        elif population >= 50000:
+            pros.append(f"Mid-size population ({population:,})")
         else:
-            cons.append(f"Small population ({row['estimated_population']:,})")
+            cons.append(f"Small population ({population:,})")
 
-        if row["university_nearby"] == 1:
+        if university:
             pros.append("University nearby (young demographic)")
-        if row["foot_traffic_tier"] >= 4:
+        if foot_t >= 4:
             pros.append("High foot traffic")
-        if row["commercial_rent_tier"] >= 4:
-            cons.append(f"High commercial rent (tier {row['commercial_rent_tier']}/5)")
-        if cafe_density == 3:
+        if rent_t >= 4:
+            cons.append(f"High commercial rent (tier {rent_t}/5)")
+        if density == 3:
             cons.append("High cafe density — competitive market")
-        elif cafe_density == 2:
+        elif density == 2:
             pros.append("Moderate cafe scene — market exists but not saturated")
         else:
             pros.append("Low cafe density — first-mover opportunity")
 
         scored.append({
-            "area": row["area"],
-            "governorate": row["governorate"],
-            "score": round(attractiveness, 2),
-            "population": int(row["estimated_population"]),
-            "university_nearby": bool(row["university_nearby"]),
-            "foot_traffic_tier": int(row["foot_traffic_tier"]),
-            "rent_tier": int(row["commercial_rent_tier"]),
-            "cafe_density": row["estimated_cafe_density"],
+            "area": area,
+            "governorate": governorate,
+            "score": round(score, 2),
+            "population": int(population),
+            "university_nearby": university,
+            "foot_traffic_tier": int(foot_t),
+            "rent_tier": int(rent_t),
+            "cafe_density": density_label,
             "pros": pros,
             "cons": cons,
         })
@@ -359,14 +504,10 @@ def evaluate_expansion(branch: str = "") -> dict:
     """
 
     # ── Load all data ─────────────────────────────────────────────────────
-    ms = _load_monthly_sales()
-    ch = _load_avg_channel()
-    co = _load_cust_orders()
-    items = _load_item_sales()
-    dc = _load_div_channel()
+    inputs = _scoring_inputs()
     areas = _load_candidate_areas()
 
-    branches = sorted(ms["branch"].unique().tolist())
+    branches = list(inputs.branches)
 
     # Validate branch input (case-insensitive)
     branch_label = branch.strip()
@@ -382,20 +523,16 @@ def evaluate_expansion(branch: str = "") -> dict:
             }
         branch_label = matched  # use canonical casing
 
-    # ── Pre-compute shared metrics ────────────────────────────────────────
-    all_totals: dict[str, float] = (
-        ms.groupby("branch")["total"].sum().to_dict()
-    )
-
     # ── Score each branch ─────────────────────────────────────────────────
     scorecards: list[dict] = []
-    for b in branches:
-        demand_sc, demand_det = _demand_trend_score(b, ms)
-        strength_sc, strength_det = _branch_strength_score(b, ms, all_totals)
-        ticket_sc, ticket_det = _avg_ticket_score(b, ch)
-        repeat_sc, repeat_det = _repeat_customer_score(b, co)
-        mix_sc, mix_det = _product_mix_score(b, items)
-        bev_sc, bev_det = _beverage_attachment_score(b, dc)
+    for b, data in inputs.branches.items():
+        demand_sc, demand_det = _demand_trend_score(data.monthly_totals)
+        strength_sc, strength_det = _branch_strength_score(
+            data.total_revenue, inputs.max_total)
+        ticket_sc, ticket_det = _avg_ticket_score(data, inputs.max_avg)
+        repeat_sc, repeat_det = _repeat_customer_score(data.num_orders)
+        mix_sc, mix_det = _product_mix_score(data, inputs.max_skus)
+        bev_sc, bev_det = _beverage_attachment_score(data)
 
         dimensions = {
             "demand_trend": {"score": demand_sc, "detail": demand_det},
@@ -423,18 +560,16 @@ def evaluate_expansion(branch: str = "") -> dict:
 
     # Build archetype profile from the best branch
     best_branch = best["branch"]
-    bch = ch[ch["branch"] == best_branch]
+    best_data = inputs.branches[best_branch]
     channel_mix = {
-        row["channel"]: round(row["sales"], 2)
-        for _, row in bch.iterrows()
+        channel: round(sales, 2)
+        for channel, sales in zip(best_data.channels, best_data.channel_sales)
     }
 
     # Top 5 revenue divisions for the best branch
-    bi = items[items["branch"] == best_branch]
-    if not bi.empty:
+    if best_data.division_revenue is not None:
         top_divs = (
-            bi.groupby("division")["total_amount"]
-            .sum()
+            best_data.division_revenue
             .sort_values(ascending=False)
             .head(5)
         )
@@ -17,14 +17,14 @@ Each branch also gets:
 
 from __future__ import annotations
 
+import functools
 import math
 from typing import Any
 
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
 
-from app.core.config import PROCESSED_DATA_DIR
+from app.core.config import PROCESSED_DATA_DIR, on_data_change
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Month ordering for sorting
@@ -41,6 +41,8 @@ DATA_PATH = PROCESSED_DATA_DIR / "monthly_sales_by_branch.csv"
 # ──────────────────────────────────────────────────────────────────────────────
 # Helpers
 # ──────────────────────────────────────────────────────────────────────────────
+@on_data_change
+@functools.lru_cache(maxsize=1)
 def _load_data() -> pd.DataFrame:
     """Load and sort the monthly-sales data, adding a chronological index."""
     df = pd.read_csv(DATA_PATH)
@@ -49,15 +51,24 @@ def _load_data() -> pd.DataFrame:
     return df
 
 
-def _detect_anomalies(series: pd.Series) -> list[int]:
+def _detect_anomalies(values: np.ndarray) -> list[int]:
     """Flag month indices whose value is < 15 % of the series median (likely
     incomplete-month data, e.g. Conut December)."""
-    if len(series) < 3:
+    if len(values) < 3:
         return []
-    median = series.median()
+    median = np.median(values)
     if median == 0:
         return []
-    return [i for i, v in enumerate(series) if v < 0.15 * median]
+    return np.flatnonzero(values < 0.15 * median).tolist()
+
+
+def _drop_anomalies(values: np.ndarray, anomaly_indices: list[int]) -> np.ndarray:
+    """Return *values* without the flagged months (the array itself if none)."""
+    if not anomaly_indices:
+        return values
+    keep = np.ones(len(values), dtype=bool)
+    keep[anomaly_indices] = False
+    return values[keep]
 
 
 def _naive_forecast(values: np.ndarray, horizon: int) -> list[float]:
@@ -77,13 +88,21 @@ def _wma_forecast(values: np.ndarray, horizon: int) -> list[float]:
     return [wma] * horizon
 
 
+def _ols_line(values: np.ndarray) -> tuple[float, float]:
+    """Closed-form least-squares (slope, intercept) of *values* on 0..n-1."""
+    x = np.arange(len(values), dtype=float)
+    xm = x.mean()
+    ym = values.mean()
+    xc = x - xm
+    denom = (xc ** 2).sum()
+    slope = float((xc * (values - ym)).sum() / denom) if denom else 0.0
+    return slope, float(ym - slope * xm)
+
+
 def _trend_forecast(values: np.ndarray, horizon: int) -> list[float]:
     """Simple OLS trend line, extrapolated forward."""
-    X = np.arange(len(values)).reshape(-1, 1)
-    y = values
-    model = LinearRegression().fit(X, y)
-    future_X = np.arange(len(values), len(values) + horizon).reshape(-1, 1)
-    preds = model.predict(future_X)
+    slope, intercept = _ols_line(values)
+    preds = intercept + slope * np.arange(len(values), len(values) + horizon)
     # Clamp negatives to zero (demand can't be negative)
     return [max(0.0, float(p)) for p in preds]
 
@@ -93,9 +112,7 @@ def _classify_trend(values: np.ndarray) -> str:
     normalised by the mean value."""
     if len(values) < 2:
         return "insufficient data"
-    X = np.arange(len(values)).reshape(-1, 1)
-    model = LinearRegression().fit(X, values)
-    slope = model.coef_[0]
+    slope, _ = _ols_line(values)
     mean = values.mean()
     if mean == 0:
         return "stable"
@@ -112,14 +129,44 @@ def _month_name(base_month_idx: int, offset: int) -> str:
     return MONTH_ORDER[(base_month_idx + offset) % 12]
 
 
-# ──────────────────────────────────────────────────────────────────────────────
-# Public API
-# ──────────────────────────────────────────────────────────────────────────────
-def forecast_branch_demand(branch: str, horizon_months: int) -> dict[str, Any]:
-    """Produce a demand forecast for *branch* over *horizon_months* months."""
+def _one_month_ahead(df: pd.DataFrame, all_branches: list[str]) -> dict[str, float]:
+    """Forecast every branch 1 month ahead (used for the demand-index share)."""
+    branch_fc_1 = {}
+    for b in all_branches:
+        bdf = df[df["branch"] == b]
+        bvals = bdf["total"].values.astype(float)
+        bclean = _drop_anomalies(bvals, _detect_anomalies(bvals))
+        if len(bclean) == 0:
+            branch_fc_1[b] = 0.0
+        else:
+            branch_fc_1[b] = float(np.mean([
+                _naive_forecast(bclean, 1)[0],
+                _wma_forecast(bclean, 1)[0],
+                _trend_forecast(bclean, 1)[0],
+            ]))
+    return branch_fc_1
+
 
+@on_data_change
+@functools.lru_cache(maxsize=1)
+def _all_branch_fc1() -> dict[str, float]:
+    """One-month-ahead forecast of every branch, keyed in sorted branch order.
+
+    Depends only on the cached monthly-sales frame, so it is computed once
+    instead of on every request.
+    """
     df = _load_data()
-    all_branches = sorted(df["branch"].unique().tolist())
+    return _one_month_ahead(df, sorted(df["branch"].unique().tolist()))
+
+
+def _forecast_one(
+    df: pd.DataFrame,
+    all_branches: list[str],
+    branch_fc_1: dict[str, float],
+    branch: str,
+    horizon_months: int,
+) -> dict[str, Any]:
+    """Forecast one branch from the already-loaded frame."""
 
     # ── resolve branch (case-insensitive, supports "all") ─────────────────
     branch_key = branch.strip().lower()
@@ -148,17 +195,15 @@ def forecast_branch_demand(branch: str, horizon_months: int) -> dict[str, Any]:
     n_months = len(raw_values)
 
     # ── anomaly handling ───────────────────────────────────────────────────
-    anomaly_indices = _detect_anomalies(pd.Series(raw_values))
-    anomaly_notes = []
-    clean_values = raw_values.copy()
-    for idx in anomaly_indices:
-        anomaly_notes.append(
-            f"{months_list[idx]} value ({raw_values[idx]:,.0f}) looks anomalously low "
-            f"(< 15% of median) — likely incomplete data. Excluded from forecast."
-        )
-        clean_values = np.delete(clean_values, idx)
+    anomaly_indices = _detect_anomalies(raw_values)
+    anomaly_notes = [
+        f"{months_list[idx]} value ({raw_values[idx]:,.0f}) looks anomalously low "
+        f"(< 15% of median) — likely incomplete data. Excluded from forecast."
+        for idx in anomaly_indices
+    ]
 
-    values = clean_values  # use cleaned series for forecasting
+    # use cleaned series for forecasting
+    values = _drop_anomalies(raw_values, anomaly_indices)
 
     # ── forecasts ──────────────────────────────────────────────────────────
     naive_fc = _naive_forecast(values, horizon_months)
@@ -183,21 +228,6 @@ def forecast_branch_demand(branch: str, horizon_months: int) -> dict[str, Any]:
         confidence = "low"
 
     # ── demand index (branch share) ────────────────────────────────────────
-    # Forecast every branch 1 month ahead, compute share
-    branch_fc_1 = {}
-    for b in all_branches:
-        bdf = df[df["branch"] == b]
-        bvals = bdf["total"].values.astype(float)
-        b_anom = _detect_anomalies(pd.Series(bvals))
-        bclean = np.delete(bvals, b_anom) if b_anom else bvals
-        if len(bclean) == 0:
-            branch_fc_1[b] = 0.0
-        else:
-            branch_fc_1[b] = float(np.mean([
-                _naive_forecast(bclean, 1)[0],
-                _wma_forecast(bclean, 1)[0],
-                _trend_forecast(bclean, 1)[0],
-            ]))
     total_fc = sum(branch_fc_1.values())
     demand_index = round(branch_fc_1.get(branch, 0) / total_fc, 4) if total_fc else 0.0
 
@@ -225,11 +255,10 @@ def forecast_branch_demand(branch: str, horizon_months: int) -> dict[str, Any]:
     ]
 
     # ── MoM growth rates (on clean values) ─────────────────────────────────
-    mom_growth = []
-    for i in range(1, len(values)):
-        prev = values[i - 1]
-        if prev != 0:
-            mom_growth.append(round((values[i] - prev) / prev * 100, 2))
+    prev = values[:-1]
+    nonzero = prev != 0
+    growth = (values[1:][nonzero] - prev[nonzero]) / prev[nonzero] * 100
+    mom_growth = [round(g, 2) for g in growth.tolist()]
 
     avg_mom_growth = round(float(np.mean(mom_growth)), 2) if mom_growth else None
 
@@ -261,3 +290,31 @@ def forecast_branch_demand(branch: str, horizon_months: int) -> dict[str, Any]:
         "anomaly_notes": anomaly_notes if anomaly_notes else None,
         "explanation": " ".join(explanation_parts),
     }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Public API
+# ──────────────────────────────────────────────────────────────────────────────
+def forecast_branch_demand(branch: str, horizon_months: int) -> dict[str, Any]:
+    """Produce a demand forecast for *branch* over *horizon_months* months."""
+    branch_fc_1 = _all_branch_fc1()
+    return _forecast_one(_load_data(), list(branch_fc_1), branch_fc_1, branch, horizon_months)
+
+
+def forecast_branch_demand_batch(branches: list[str], horizon_months: int) -> dict[str, dict | Exception]:
+    """Forecast several branches from one data load.
+
+    The CSV read and the all-branch demand-index forecasts are shared, so
+    this costs little more than a single ``forecast_branch_demand`` call.
+    Per-branch failures are returned in place as the exception instance.
+    """
+    df = _load_data()
+    branch_fc_1 = _all_branch_fc1()
+    all_branches = list(branch_fc_1)
+    results: dict[str, dict | Exception] = {}
+    for b in branches:
+        try:
+            results[b] = _forecast_one(df, all_branches, branch_fc_1, b, horizon_months)
+        except Exception as exc:
+            results[b] = exc
+    return results
@@ -25,6 +25,8 @@ from pathlib import Path
 
 import pandas as pd
 
+from app.core.config import on_data_change
+
 DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "processed"
 
 # Beverage divisions in the item-sales file
@@ -46,6 +48,7 @@ DESSERT_KEYWORDS = {"CHIMNEY", "CONUT", "MINI", "BOWL", "BITES", "ICE CREAM", "T
 # Data loaders (cached)
 # ---------------------------------------------------------------------------
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_item_sales() -> pd.DataFrame:
     path = DATA_DIR / "Sales by items and groups.csv"
@@ -55,6 +58,7 @@ def _load_item_sales() -> pd.DataFrame:
     return df
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_channel_summary() -> pd.DataFrame:
     path = DATA_DIR / "Summary by division-menu channel.csv"
@@ -64,6 +68,7 @@ def _load_channel_summary() -> pd.DataFrame:
     return df
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_basket_lines() -> pd.DataFrame:
     path = DATA_DIR / "basket_lines.csv"
@@ -75,6 +80,7 @@ def _load_basket_lines() -> pd.DataFrame:
     return df
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_monthly_sales() -> pd.DataFrame:
     path = DATA_DIR / "monthly_sales_by_branch.csv"
@@ -93,6 +99,7 @@ def _load_monthly_sales() -> pd.DataFrame:
     return df
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_avg_sales_channel() -> pd.DataFrame:
     path = DATA_DIR / "avg_sales_by_menu_channel.csv"
@@ -104,6 +111,7 @@ def _load_avg_sales_channel() -> pd.DataFrame:
     return df
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_customer_orders() -> pd.DataFrame:
     path = DATA_DIR / "customer_orders_delivery.csv"
@@ -115,6 +123,7 @@ def _load_customer_orders() -> pd.DataFrame:
     return df
 
 
+@on_data_change
 @functools.lru_cache(maxsize=1)
 def _load_attendance() -> pd.DataFrame:
     path = DATA_DIR / "time_attendance_dec2025.csv"
@@ -233,10 +233,9 @@ def _estimate_staffing(
     }
 
 
-def recommend_staffing(branch: str, shift: str) -> dict:
-    attendance_df = _load_attendance_data()
-    monthly_sales_df = _load_monthly_sales_data()
-
+def _recommend_for(
+    attendance_df: pd.DataFrame, monthly_sales_df: pd.DataFrame | None, branch: str, shift: str
+) -> dict:
     available_branches = sorted(attendance_df["branch"].dropna().unique().tolist())
 
     # "all" is not meaningful for staffing (each branch has different staff)
@@ -253,3 +252,27 @@ def recommend_staffing(branch: str, shift: str) -> dict:
     normalized_shift = _normalize_shift(shift)
 
     return _estimate_staffing(attendance_df, monthly_sales_df, canonical_branch, normalized_shift)
+
+
+def recommend_staffing(branch: str, shift: str) -> dict:
+    attendance_df = _load_attendance_data()
+    monthly_sales_df = _load_monthly_sales_data()
+    return _recommend_for(attendance_df, monthly_sales_df, branch, shift)
+
+
+def recommend_staffing_batch(branches: list[str], shift: str) -> dict[str, dict | Exception]:
+    """``recommend_staffing`` for several branches from one load of both CSVs.
+
+    Per-branch failures are returned in place as the exception instance:
+    an ``HTTPException`` for a bad branch (e.g. no attendance records) or
+    shift, anything else for an unexpected error.
+    """
+    attendance_df = _load_attendance_data()
+    monthly_sales_df = _load_monthly_sales_data()
+    results: dict[str, dict | Exception] = {}
+    for branch in branches:
+        try:
+            results[branch] = _recommend_for(attendance_df, monthly_sales_df, branch, shift)
+        except Exception as exc:
+            results[branch] = exc
+    return results
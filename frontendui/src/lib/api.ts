@@ -17,6 +17,7 @@ export interface HealthResponse {
 /* ───────────────────────── Chat ─────────────────────────── */
 export interface ChatRequest {
   question: string; // backend expects "question", NOT "message"
+  format?: "markdown" | "json"; // "json" → empty answer, render `data` client-side
 }
 export interface ChatResponse {
   intent: string;
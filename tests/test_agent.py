@@ -206,6 +206,346 @@ class TestAgentEndToEnd(unittest.TestCase):
         self.assertEqual(resp.branch, "Main Street Coffee")
         self.assertIn("Growth", resp.answer)
 
+    def test_ask_json_skips_markdown(self):
+        from app.agent.agent import ask
+        resp = ask("What are the top 3 combos for Conut Jnah?", markdown=False)
+        self.assertEqual(resp.intent, "combo")
+        self.assertEqual(resp.answer, "")
+        self.assertTrue(resp.raw_data["recommendations"])
+
+    def test_to_dict_covers_every_field(self):
+        from dataclasses import fields
+        from app.agent.agent import ask
+        resp = ask("Forecast demand for Conut - Tyre next 4 months")
+        d = resp.to_dict()
+        self.assertEqual(list(d), [f.name for f in fields(resp)])
+        self.assertIs(d["raw_data"], resp.raw_data)
+
+    def test_ask_async_concurrent(self):
+        import asyncio
+        from app.agent.agent import ask_async
+
+        async def _run():
+            return await asyncio.gather(
+                ask_async("What are the top 3 combos for Conut Jnah?"),
+                ask_async("Forecast demand for Conut - Tyre next 4 months"),
+            )
+
+        combo, forecast = asyncio.run(_run())
+        self.assertEqual(combo.intent, "combo")
+        self.assertEqual(combo.branch, "Conut Jnah")
+        self.assertEqual(forecast.intent, "forecast")
+        self.assertIn("Forecast", forecast.answer)
+
+
+# ════════════════════════════════════════════════════════════════════════
+#  4. Intent cache
+# ════════════════════════════════════════════════════════════════════════
+
+class TestIntentCache(unittest.TestCase):
+
+    def test_repeat_question_skips_classifier(self):
+        from unittest import mock
+        from app.agent import agent, llm_intent
+
+        agent._intent_cache.clear()
+        with mock.patch.object(llm_intent, "smart_classify", wraps=llm_intent.smart_classify) as spy:
+            first = agent._classify("How many staff for the evening shift?")
+            second = agent._classify("  how many STAFF for the evening   shift?")
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(first.action, second.action)
+        self.assertEqual(second.raw_question, "  how many STAFF for the evening   shift?")
+
+    def test_llm_failure_fallback_is_not_cached(self):
+        from unittest import mock
+        from app.agent import agent, llm_intent
+        from app.agent.intent import Intent
+
+        agent._intent_cache.clear()
+        llm = mock.Mock(side_effect=[None, Intent(action="growth", matched_keywords=["llm"])])
+        with mock.patch.object(llm_intent, "_get_client", return_value=object()), \
+             mock.patch.object(llm_intent, "llm_classify", llm):
+            first = agent._classify("How is the coffee business doing?")
+            second = agent._classify("How is the coffee business doing?")
+            third = agent._classify("How is the coffee business doing?")
+        self.assertNotIn("llm", first.matched_keywords)
+        self.assertEqual(second.action, "growth")
+        self.assertEqual(third.action, "growth")
+        self.assertEqual(llm.call_count, 2)
+
+    def test_cached_intents_are_independent_copies(self):
+        from app.agent import agent
+
+        agent._intent_cache.clear()
+        first = agent._classify("Top combos at Conut Jnah")
+        first.matched_keywords.append("tampered")
+        second = agent._classify("Top combos at Conut Jnah")
+        second.matched_keywords.append("tampered again")
+        third = agent._classify("Top combos at Conut Jnah")
+        self.assertNotIn("tampered", third.matched_keywords)
+        self.assertNotIn("tampered again", third.matched_keywords)
+
+    def test_regex_cache_returns_independent_copies(self):
+        first = classify_intent("Top combos at Conut Jnah")
+        first.matched_keywords.append("tampered")
+        first.branch = "Nope"
+        second = classify_intent("Top combos at Conut Jnah")
+        self.assertNotIn("tampered", second.matched_keywords)
+        self.assertEqual(second.branch, "Conut Jnah")
+
+
+# ════════════════════════════════════════════════════════════════════════
+#  5. LLM budget fallback
+# ════════════════════════════════════════════════════════════════════════
+
+class TestLLMBudget(unittest.TestCase):
+
+    def test_slow_llm_falls_back_to_regex(self):
+        import time
+        from unittest import mock
+        from app.agent import llm_intent
+        from app.agent.intent import Intent
+
+        def slow_llm(question, deadline=None):
+            time.sleep(1.0)
+            return Intent(action="growth", matched_keywords=["llm"])
+
+        with mock.patch.object(llm_intent, "_get_client", return_value=object()), \
+             mock.patch.object(llm_intent, "llm_classify", side_effect=slow_llm), \
+             mock.patch.object(llm_intent, "LLM_BUDGET_S", 0.05):
+            t0 = time.perf_counter()
+            intent = llm_intent.smart_classify("What are the top combos?")
+            elapsed = time.perf_counter() - t0
+        self.assertEqual(intent.action, "combo")
+        self.assertLess(elapsed, 0.5)
+
+    def test_worker_stops_retrying_after_budget(self):
+        import time
+        from types import SimpleNamespace
+        from unittest import mock
+        from app.agent import llm_intent
+
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs["timeout"])
+            raise ConnectionError("boom")
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        with mock.patch.object(llm_intent, "_is_retryable", return_value=True):
+            t0 = time.perf_counter()
+            result = llm_intent._create_with_retries(client, {}, time.monotonic() + 0.2)
+            elapsed = time.perf_counter() - t0
+        self.assertIsNone(result)
+        self.assertEqual(len(calls), 1)
+        self.assertLessEqual(calls[0], 0.2)
+        self.assertLess(elapsed, 0.2)
+
+    def test_malformed_env_number_uses_default(self):
+        from unittest import mock
+        from app.agent import llm_intent
+
+        env = {"OPENAI_TIMEOUT": "5   # seconds per call", "OPENAI_CLASSIFY_BUDGET": "2.5"}
+        with mock.patch.dict(os.environ, env), self.assertLogs(llm_intent.logger, "WARNING"):
+            self.assertEqual(llm_intent._env_float("OPENAI_TIMEOUT", 5.0), 5.0)
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(llm_intent._env_float("OPENAI_CLASSIFY_BUDGET", 1.5), 2.5)
+
+    def test_concurrent_questions_share_one_batch_request(self):
+        import json
+        from concurrent.futures import ThreadPoolExecutor
+        from types import SimpleNamespace
+        from unittest import mock
+        from app.agent import llm_intent
+
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            n = kwargs["messages"][1]["content"].count("\n") + 1
+            labels = ["staffing", "growth", "expansion"][:n]
+            content = json.dumps({"results": [{"intent": l, "confidence": 0.9} for l in labels]})
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        batcher = llm_intent._Batcher(0.1, 8, llm_intent._llm_pool)
+        questions = ["Do we need more workers?", "How can we sell more drinks?", "Should we enter Tripoli?"]
+        with mock.patch.object(llm_intent, "_get_client", return_value=client), \
+             mock.patch.object(llm_intent, "_batcher", batcher), \
+             mock.patch.object(llm_intent, "LLM_BATCH_WINDOW_S", 0.1):
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                intents = list(pool.map(llm_intent.smart_classify, questions))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([i.action for i in intents], ["staffing", "growth", "expansion"])
+        self.assertEqual([i.raw_question for i in intents], questions)
+
+
+# ════════════════════════════════════════════════════════════════════════
+#  6. Service result cache
+# ════════════════════════════════════════════════════════════════════════
+
+class TestServiceCache(unittest.TestCase):
+
+    def test_repeat_call_hits_cache_until_data_changes(self):
+        from unittest import mock
+        from app.agent import tools
+
+        calls = []
+
+        @tools.ttl_cache(maxsize=4, ttl=60)
+        def service(branch):
+            calls.append(branch)
+            return {"branch": branch}
+
+        with mock.patch.object(tools, "_data_version", return_value=1):
+            first = service(branch="Conut Jnah")
+            self.assertIs(service(branch="Conut Jnah"), first)
+        with mock.patch.object(tools, "_data_version", return_value=2):
+            service(branch="Conut Jnah")
+        self.assertEqual(calls, ["Conut Jnah", "Conut Jnah"])
+
+    def test_batch_with_failed_branch_is_logged_and_not_cached(self):
+        from app.agent import tools
+
+        calls = []
+
+        @tools.ttl_cache(maxsize=4, ttl=60)
+        def batch(branches):
+            calls.append(branches)
+            return {"Conut Jnah": {"ok": True}, "Nowhere": KeyError("Nowhere")}
+
+        with self.assertLogs(tools.logger, "ERROR") as logs:
+            res = tools._multi_branch_batch(batch, ("Conut Jnah", "Nowhere"))
+        self.assertIn("cid=", res["error"])
+        self.assertIsNotNone(logs.records[0].exc_info)
+        tools._multi_branch_batch(batch, ("Conut Jnah", "Nowhere"))
+        self.assertEqual(len(calls), 2)
+
+    def test_batch_with_client_error_is_cached(self):
+        from fastapi import HTTPException
+        from app.agent import tools
+
+        calls = []
+
+        @tools.ttl_cache(maxsize=4, ttl=60)
+        def batch(branches):
+            calls.append(branches)
+            return {"Conut Jnah": {"ok": True}, "Conut": HTTPException(404, "No attendance data")}
+
+        with self.assertLogs(tools.logger, "INFO") as logs:
+            first = tools._multi_branch_batch(batch, ("Conut Jnah", "Conut"))
+            second = tools._multi_branch_batch(batch, ("Conut Jnah", "Conut"))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first, second)
+        self.assertNotIn("cid=", first["error"])
+        self.assertTrue(all(r.levelname == "INFO" and r.exc_info is None for r in logs.records))
+
+    def test_data_change_clears_service_loaders(self):
+        from unittest import mock
+        from app.core import config
+        from app.services import forecast_service
+
+        forecast_service._load_data()
+        self.assertEqual(forecast_service._load_data.cache_info().currsize, 1)
+        with mock.patch.object(config, "_data_mtime", -1), \
+             mock.patch.object(config, "_data_checked", float("-inf")):
+            version = config.DATA_VERSION
+            self.assertEqual(config.data_version(), version + 1)
+        self.assertEqual(forecast_service._load_data.cache_info().currsize, 0)
+
+    def test_concurrent_misses_compute_once(self):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from app.agent import tools
+
+        calls = []
+        started = threading.Event()
+
+        @tools.ttl_cache(maxsize=4, ttl=60)
+        def service(branch):
+            calls.append(branch)
+            started.set()
+            time.sleep(0.1)
+            return {"branch": branch}
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            first = pool.submit(service, branch="Conut")
+            started.wait()
+            rest = [pool.submit(service, branch="Conut") for _ in range(3)]
+            results = [first.result()] + [f.result() for f in rest]
+        self.assertEqual(calls, ["Conut"])
+        self.assertTrue(all(r is results[0] for r in results))
+
+
+# ════════════════════════════════════════════════════════════════════════
+#  7. Chitchat streaming
+# ════════════════════════════════════════════════════════════════════════
+
+class TestChitchatStream(unittest.TestCase):
+
+    def test_stream_yields_llm_deltas(self):
+        from types import SimpleNamespace
+        from unittest import mock
+        from app.agent import llm_intent, tools
+        from app.agent.intent import Intent
+
+        chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=t))])
+                  for t in ("Hi", None, " there!")]
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=lambda **kwargs: iter(chunks))))
+        intent = Intent(action="chitchat", raw_question="hello")
+        with mock.patch.object(llm_intent, "_get_client", return_value=client):
+            self.assertEqual(list(tools.chitchat_stream(intent)), ["Hi", " there!"])
+        with mock.patch.object(llm_intent, "_get_client", return_value=None):
+            self.assertEqual(tools._chitchat_reply(intent), tools._STATIC_CHITCHAT)
+
+
+# ════════════════════════════════════════════════════════════════════════
+#  8. Reentrant dispatch
+# ════════════════════════════════════════════════════════════════════════
+
+class TestReentrantDispatch(unittest.TestCase):
+    """dispatch() must be safe to call from many threads at once."""
+
+    def _clear_tool_caches(self):
+        from app.agent import tools
+        for fn in (tools._combo, tools._forecast, tools._staffing, tools._expansion, tools._growth,
+                   tools._combo_batch, tools._forecast_batch, tools._staffing_batch):
+            fn.cache_clear()
+
+    def test_concurrent_dispatch_matches_sequential(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from dataclasses import asdict
+        import pandas as pd
+        from app.agent.intent import Intent
+        from app.agent.tools import dispatch
+        from app.services import combo_service, expansion_service
+
+        intents = [
+            Intent(action="combo", branch="Conut Jnah", top_k=3),
+            Intent(action="combo", branch=None),
+            Intent(action="forecast", branch="Conut - Tyre", horizon_months=4),
+            Intent(action="forecast", branch="all"),
+            Intent(action="staffing", branch="Main Street Coffee", shift="evening"),
+            Intent(action="expansion", branch=None),
+            Intent(action="growth", branch="Conut Jnah"),
+        ]
+        frames = [combo_service._load_basket_lines(), expansion_service._load_monthly_sales()]
+        before = [pd.util.hash_pandas_object(f).sum() for f in frames]
+        snapshots = [asdict(i) for i in intents]
+
+        self._clear_tool_caches()
+        expected = [dispatch(i)["data"] for i in intents]
+        self._clear_tool_caches()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            actual = list(pool.map(lambda i: dispatch(i)["data"], intents * 3))
+
+        self.assertEqual(actual, expected * 3)
+        self.assertEqual([asdict(i) for i in intents], snapshots)
+        self.assertEqual([pd.util.hash_pandas_object(f).sum() for f in frames], before)
+
 
 # ════════════════════════════════════════════════════════════════════════
 
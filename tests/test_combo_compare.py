@@ -81,6 +81,26 @@ class ComboCompareTests(unittest.TestCase):
             body["ml_answer_line"].startswith("The ML [Item-Item Cosine Similarity] answer:")
         )
 
+    def test_combo_endpoint_honours_if_none_match(self) -> None:
+        first = self.client.post("/combo", json=self.payload)
+        etag = first.headers["etag"]
+        repeat = self.client.post("/combo", json=self.payload, headers={"If-None-Match": etag})
+        self.assertEqual(repeat.status_code, 304)
+        changed = self.client.post(
+            "/combo", json={**self.payload, "top_k": 3}, headers={"If-None-Match": etag}
+        )
+        self.assertEqual(changed.status_code, 200)
+
+    def test_thresholds_reuse_prepared_branch_data(self) -> None:
+        from app.services import combo_service
+
+        combo_service._prepare_branch.cache_clear()
+        strict = recommend_combos(**{**self.payload, "branch": "All ", "min_lift": 2.0})
+        misses = combo_service._prepare_branch.cache_info().misses
+        compare_combo_solutions(**self.payload)
+        self.assertEqual(combo_service._prepare_branch.cache_info().misses, misses)
+        self.assertEqual(strict["branch"], "All")
+
 
 if __name__ == "__main__":
     unittest.main()
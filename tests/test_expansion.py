@@ -8,6 +8,7 @@ Run:  python tests/test_expansion.py
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from app.services import expansion_service
 from app.services.expansion_service import evaluate_expansion
 
 
@@ -97,11 +98,24 @@ def test_all_keyword():
     print("✅ TEST 4 PASSED\n")
 
 
+def test_scoring_inputs_reused():
+    print("=" * 70)
+    print("TEST 5 — Repeat calls reuse the cached per-branch inputs")
+    print("=" * 70)
+    first = evaluate_expansion("")
+    misses = expansion_service._scoring_inputs.cache_info().misses
+    assert evaluate_expansion("Conut Jnah")["scorecards"] == first["scorecards"]
+    assert evaluate_expansion("") == first
+    assert expansion_service._scoring_inputs.cache_info().misses == misses
+    print("✅ TEST 5 PASSED\n")
+
+
 if __name__ == "__main__":
     test_all_branches()
     test_specific_branch()
     test_unknown_branch()
     test_all_keyword()
+    test_scoring_inputs_reused()
     print("=" * 70)
     print("ALL EXPANSION TESTS PASSED ✅")
     print("=" * 70)